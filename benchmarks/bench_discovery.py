@@ -0,0 +1,103 @@
+"""
+Compares discovery mode with a full crawl of a wide, sparsely populated roll
+number range served by the local mock result server: how many requests each
+makes and how many of the existing results each finds.
+
+All discovery rounds and the full crawl share one thread pool, so each
+worker's session fetches its form tokens once rather than once per round.
+Token GETs are reported next to the search POSTs.
+
+    python benchmarks/bench_discovery.py --range 20000 --blocks 8 --block-size 300
+"""
+import argparse
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from mock_resultday import MockResultDayServer
+
+from bise_discovery import discover_valid_ranges
+from bise_scheduler import AdaptiveScheduler
+from bise_scraper import fetch_bise_result
+
+
+def make_blocks(first_roll_no, range_size, block_count, block_size, seed=11):
+    """
+    Places `block_count` blocks of roughly `block_size` rolls at random, non-overlapping offsets.
+    """
+    rng = random.Random(seed)
+    slot = range_size // block_count
+    blocks = []
+    for index in range(block_count):
+        size = rng.randint(block_size // 2, block_size)
+        start = first_roll_no + index * slot + rng.randint(0, max(0, slot - size))
+        blocks.append((start, start + size - 1))
+    return blocks
+
+
+def fetch_found(url, roll_numbers, concurrency, executor):
+    """
+    Returns:
+        dict: roll number (int) -> True if the server has a result for it.
+    """
+    found = {}
+    scheduler = AdaptiveScheduler(max_concurrency=concurrency, initial_concurrency=concurrency)
+    asyncio.run(scheduler.run(
+        [str(roll) for roll in roll_numbers],
+        lambda roll_no: fetch_bise_result(roll_no, base_url=url),
+        on_result=lambda roll_no, record: found.__setitem__(int(roll_no), bool(record)),
+        executor=executor,
+    ))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark discovery mode against a full crawl.")
+    parser.add_argument("--range", type=int, default=20000, help="Number of roll numbers in the range.")
+    parser.add_argument("--blocks", type=int, default=8, help="Populated blocks in the range.")
+    parser.add_argument("--block-size", type=int, default=300, help="Largest block size.")
+    parser.add_argument("--hole-rate", type=float, default=0.05, help="Fraction of absent rolls inside blocks.")
+    parser.add_argument("--step", type=int, default=50, help="Discovery sampling stride.")
+    parser.add_argument("--gap-tolerance", type=int, default=10, help="Misses that end a block.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skip-full", action="store_true", help="Only run discovery; count the full crawl analytically.")
+    args = parser.parse_args()
+
+    first_roll_no = 500001
+    last_roll_no = first_roll_no + args.range - 1
+    blocks = make_blocks(first_roll_no, args.range, args.blocks, args.block_size)
+
+    with MockResultDayServer(valid_ranges=blocks, hole_rate=args.hole_rate) as server, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        expected = {roll for low, high in blocks for roll in range(low, high + 1) if server.has_result(roll)}
+
+        started = time.perf_counter()
+        found_blocks, known = discover_valid_ranges(
+            first_roll_no, last_roll_no,
+            lambda rolls: fetch_found(server.url, rolls, args.concurrency, executor),
+            step=args.step, gap_tolerance=args.gap_tolerance,
+        )
+        discovery_seconds = time.perf_counter() - started
+        discovery_requests, discovery_token_requests = server.post_count, server.get_count
+        discovered = {roll for roll, found in known.items() if found}
+
+        if not args.skip_full:
+            started = time.perf_counter()
+            full = fetch_found(server.url, range(first_roll_no, last_roll_no + 1), args.concurrency, executor)
+            full_seconds = time.perf_counter() - started
+            full_found = {roll for roll, found in full.items() if found}
+            print(f"full crawl: {args.range} requests, {server.get_count - discovery_token_requests} token requests, "
+                  f"{len(full_found)}/{len(expected)} results, {full_seconds:.1f}s")
+        else:
+            print(f"full crawl: {args.range} requests (not run)")
+
+    print(f"discovery:  {discovery_requests} requests, {discovery_token_requests} token requests, "
+          f"{len(discovered)}/{len(expected)} results, {discovery_seconds:.1f}s, "
+          f"{len(found_blocks)} blocks found of {len(blocks)}")
+    print(f"request reduction: {args.range / (discovery_requests + discovery_token_requests):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Measures export time and peak Python memory of the streaming Excel writer for
+growing numbers of synthetic student records.
+
+    python benchmarks/bench_export.py --sizes 10000,50000,100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from mock_resultday import build_student
+
+from bise_excel import export_to_excel
+from bise_parser import SUBJECT_COLUMN_MAP, empty_record
+
+
+def synthetic_records(count, first_roll_no=520001):
+    """
+    Yields `count` student records shaped like the parser's output.
+    """
+    for roll_no in range(first_roll_no, first_roll_no + count):
+        name, father_name, subjects, overall = build_student(roll_no)
+        record = empty_record()
+        record.update({'Roll-No': str(roll_no), 'Candidate Name': name,
+                       'Father Name': father_name, 'overall result': overall})
+        for subject, _, obtained in subjects:
+            record[SUBJECT_COLUMN_MAP[subject]] = str(obtained)
+        yield record
+
+
+def measure(count, directory):
+    """
+    Exports `count` records twice: once untraced for the timing, since
+    tracemalloc slows allocation down considerably, and once traced for the
+    peak memory.
+    """
+    filename = os.path.join(directory, f"export_{count}.xlsx")
+    started = time.perf_counter()
+    export_to_excel(synthetic_records(count), filename)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    export_to_excel(synthetic_records(count), filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming Excel exporter.")
+    parser.add_argument("--sizes", default="10000,50000,100000", help="Comma separated row counts to export.")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'seconds':>9} {'sec/10k rows':>13} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in [int(value) for value in args.sizes.split(",")]:
+            elapsed, peak = measure(count, directory)
+            print(f"{count:>8} {elapsed:>9.2f} {elapsed / count * 10000:>13.2f} {peak / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
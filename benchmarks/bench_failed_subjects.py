@@ -0,0 +1,95 @@
+"""
+Checks the precompiled failed-subject classifier against the original
+split-and-strip logic on synthetic 'overall result' strings, then times the
+original loop, the cached per-string classifier and the vectorized column pass.
+
+    python benchmarks/bench_failed_subjects.py --rows 1000000
+"""
+import argparse
+import random
+import re
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+import pandas as pd
+
+from bise_failed_subjects import (
+    FAILED_SUBJECT_KEYWORDS_MAP,
+    failed_subject_mask,
+    failed_subject_masks,
+    failed_subjects,
+    subjects_from_mask,
+)
+
+SUFFIXES = ["", "I", "II", "(PR)", "I(PR)", "II(PR)"]
+SEPARATORS = [" ", "/", "-", "  "]
+
+
+def legacy_failed_subjects(overall_result):
+    """
+    The tokenizing loop append_to_excel used before the classifier existed.
+    """
+    failed = set()
+    words = str(overall_result).upper().replace('/', ' ').replace('-', ' ').split()
+    for word in words:
+        clean_word = word.strip()
+        clean_word = clean_word.replace('(PR)', '')
+        clean_word = re.sub(r'II$', '', clean_word)
+        clean_word = re.sub(r'I$', '', clean_word)
+        if clean_word in FAILED_SUBJECT_KEYWORDS_MAP:
+            failed.add(FAILED_SUBJECT_KEYWORDS_MAP[clean_word])
+    return failed
+
+
+def synthetic_results(count, seed=7):
+    """
+    Generates a realistic mix: mostly passes with a mark total, the rest failing
+    one to three subjects with part/practical suffixes and assorted separators.
+    """
+    rng = random.Random(seed)
+    keywords = list(FAILED_SUBJECT_KEYWORDS_MAP)
+    results = []
+    for _ in range(count):
+        if rng.random() < 0.7:
+            results.append(f"PASS {rng.randint(400, 1100)}")
+        else:
+            failed = rng.sample(keywords, rng.randint(1, 3))
+            parts = [keyword + rng.choice(SUFFIXES) for keyword in failed]
+            text = "FAIL " + rng.choice(SEPARATORS).join(parts)
+            results.append(text.lower() if rng.random() < 0.05 else text)
+    return results
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    value = func()
+    print(f"{label:<32} {time.perf_counter() - started:>8.3f} s")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the failed-subject classifier.")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of synthetic overall result strings.")
+    args = parser.parse_args()
+
+    results = synthetic_results(args.rows)
+    mismatches = [text for text in set(results) if failed_subjects(text) != legacy_failed_subjects(text)]
+    print(f"{len(set(results))} distinct strings, {len(mismatches)} disagree with the original logic")
+    for text in mismatches[:10]:
+        print(f"  MISMATCH: {text!r}")
+
+    timed("original split/re.sub loop", lambda: [legacy_failed_subjects(text) for text in results])
+    failed_subject_mask.cache_clear()
+    timed("cached classifier, per row", lambda: [failed_subject_mask(text) for text in results])
+    series = pd.Series(results)
+    failed_subject_mask.cache_clear()
+    masks = timed("vectorized column pass", lambda: failed_subject_masks(series))
+
+    assert all(subjects_from_mask(int(mask)) == failed_subjects(text)
+               for mask, text in zip(masks.head(1000), results[:1000]))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Measures how fetch throughput scales with the concurrency limit of the
+adaptive scheduler, using the local stand-in result server so no requests
+reach the board.
+
+    python benchmarks/bench_fetch.py --rolls 200 --latency 0.05
+"""
+import argparse
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from mock_resultday import MockResultDayServer
+
+from bise_scheduler import AdaptiveScheduler, run_scheduled
+from bise_scraper import ResultFetcher
+
+
+def run(url, roll_numbers, concurrency):
+    """
+    Fetches every roll number once and returns the elapsed time and the number of records found.
+    """
+    # Start at the limit so each level measures that level, not the ramp up to it
+    scheduler = AdaptiveScheduler(max_concurrency=concurrency, initial_concurrency=concurrency)
+    started = time.perf_counter()
+    fetched = run_scheduled(roll_numbers, ResultFetcher(base_url=url), scheduler)
+    elapsed = time.perf_counter() - started
+    return elapsed, sum(1 for _, record in fetched if record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetch throughput of the scheduler against the mock server.")
+    parser.add_argument("--rolls", type=int, default=200, help="Number of roll numbers to fetch per run.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated server latency in seconds.")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma separated concurrency levels to try.")
+    args = parser.parse_args()
+
+    roll_numbers = [str(520001 + i) for i in range(args.rolls)]
+
+    with MockResultDayServer(latency=args.latency) as server:
+        print(f"{'concurrency':>11} {'seconds':>9} {'rolls/sec':>10} {'found':>6}")
+        for level in [int(value) for value in args.levels.split(",")]:
+            elapsed, found = run(server.url, roll_numbers, level)
+            print(f"{level:>11} {elapsed:>9.2f} {len(roll_numbers) / elapsed:>10.1f} {found:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Checks the single-pass result page parser against the original
+BeautifulSoup extraction on a corpus of saved result pages, then compares
+how many pages per second each can parse.
+
+    python benchmarks/bench_parse.py --pages benchmarks/pages --iterations 2000
+"""
+import argparse
+import glob
+import os
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from bs4 import BeautifulSoup
+
+from bise_parser import SUBJECT_COLUMN_MAP, empty_record, parse_result_page, parse_tokens
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+
+def legacy_parse_result_page(html):
+    """
+    The extraction retrieve_bise_result used before bise_parser existed, kept
+    here as the reference the new parser must agree with.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    student_record = empty_record()
+    student_record['Roll-No'] = soup.find('span', id='LblRollNo').get_text(strip=True) if soup.find('span', id='LblRollNo') else ''
+    student_record['Candidate Name'] = soup.find('span', id='LblName').get_text(strip=True) if soup.find('span', id='LblName') else ''
+    student_record['Father Name'] = soup.find('span', id='LblFatherName').get_text(strip=True) if soup.find('span', id='LblFatherName') else ''
+    student_record['overall result'] = soup.find('span', id='lblGazres').get_text(strip=True) if soup.find('span', id='lblGazres') else ''
+    if not student_record['Roll-No']:
+        return None
+
+    result_table = soup.find('table', id='TblResult')
+    if result_table:
+        rows = result_table.find_all('tr')[5:]
+        for row in rows:
+            cols = row.find_all(['td', 'th'])
+            if len(cols) >= 3:
+                excel_column_name = SUBJECT_COLUMN_MAP.get(cols[0].get_text(strip=True))
+                if excel_column_name:
+                    student_record[excel_column_name] = cols[2].get_text(strip=True)
+    return student_record
+
+
+def legacy_parse_tokens(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    viewstate = soup.find('input', {'name': '__VIEWSTATE'})
+    eventvalidation = soup.find('input', {'name': '__EVENTVALIDATION'})
+    return (viewstate['value'] if viewstate else '', eventvalidation['value'] if eventvalidation else '')
+
+
+def load_corpus(pages_dir):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+        with open(path, encoding="utf-8") as page_file:
+            pages[os.path.basename(path)] = page_file.read()
+    return pages
+
+
+def check_corpus(pages):
+    """
+    Returns the names of pages where the two parsers disagree.
+    """
+    mismatches = []
+    for name, html in pages.items():
+        if parse_result_page(html) != legacy_parse_result_page(html) or \
+                parse_tokens(html) != legacy_parse_tokens(html):
+            mismatches.append(name)
+    return mismatches
+
+
+def pages_per_second(parse, pages, iterations):
+    html_list = list(pages.values())
+    started = time.perf_counter()
+    for i in range(iterations):
+        parse(html_list[i % len(html_list)])
+    return iterations / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the result page parsers for correctness and speed.")
+    parser.add_argument("--pages", default=PAGES_DIR, help="Directory of saved result pages (*.html).")
+    parser.add_argument("--iterations", type=int, default=2000, help="Pages parsed per timing run.")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.pages)
+    if not pages:
+        raise SystemExit(f"No .html pages found in {args.pages}")
+
+    mismatches = check_corpus(pages)
+    print(f"Corpus: {len(pages)} pages, {len(pages) - len(mismatches)} match the BeautifulSoup parser")
+    for name in mismatches:
+        print(f"  MISMATCH: {name}")
+
+    legacy_rate = pages_per_second(legacy_parse_result_page, pages, args.iterations)
+    fast_rate = pages_per_second(parse_result_page, pages, args.iterations)
+    print(f"BeautifulSoup parser: {legacy_rate:>9.0f} pages/sec")
+    print(f"Single-pass parser:   {fast_rate:>9.0f} pages/sec ({fast_rate / legacy_rate:.1f}x)")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
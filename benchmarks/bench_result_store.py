@@ -0,0 +1,85 @@
+"""
+Measures the columnar result store on a board-sized set of synthetic
+records: build and save/load time, file size against the records as JSON,
+and the time of each aggregate query. Also checks the pass rates against a
+plain pandas computation on the same records.
+
+    python benchmarks/bench_result_store.py --rows 200000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from bench_export import synthetic_records
+
+from bise_failed_subjects import failed_subjects
+from bise_result_store import SUBJECT_RECORD_COLUMNS, ResultStore
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def reference_pass_rates(records):
+    """
+    Pass rates computed record by record, as the store's answer must match.
+    """
+    appeared = dict.fromkeys(SUBJECT_RECORD_COLUMNS, 0)
+    failed = dict.fromkeys(SUBJECT_RECORD_COLUMNS, 0)
+    for record in records:
+        failed_in = failed_subjects(record['overall result'])
+        for subject in SUBJECT_RECORD_COLUMNS:
+            if str(record.get(subject, '')).isdigit():
+                appeared[subject] += 1
+                failed[subject] += subject in failed_in
+    return {subject: 1 - failed[subject] / appeared[subject] for subject in appeared if appeared[subject]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar result store and its queries.")
+    parser.add_argument("--rows", type=int, default=200000, help="Number of synthetic student records.")
+    args = parser.parse_args()
+
+    records = list(synthetic_records(args.rows))
+    store, build_time = timed(ResultStore.from_records, records)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "results.npz")
+        _, save_time = timed(store.save, path)
+        store, load_time = timed(ResultStore.load, path)
+        store_size = os.path.getsize(path)
+    json_size = sum(len(json.dumps(record)) + 1 for record in records)
+
+    print(f"{len(store)} records: build {build_time:.2f} s, save {save_time:.2f} s, load {load_time * 1000:.1f} ms")
+    print(f"File size: {store_size / 1e6:.1f} MB (records as JSON lines: {json_size / 1e6:.1f} MB)")
+
+    queries = [
+        ("status_counts", store.status_counts),
+        ("pass_rates", store.pass_rates),
+        ("top_students(10)", store.top_students),
+        ("top_students(10, 'Physics')", lambda: store.top_students(10, 'Physics')),
+        ("failures_by_subject", store.failures_by_subject),
+        ("failed_subject_counts", store.failed_subject_counts),
+        ("failure_combinations", store.failure_combinations),
+    ]
+    print(f"{'query':<30} {'ms':>8}")
+    for name, query in queries:
+        _, elapsed = timed(query)
+        print(f"{name:<30} {elapsed * 1000:>8.2f}")
+
+    sample = records[:20000]
+    expected = reference_pass_rates(sample)
+    actual = ResultStore.from_records(sample).pass_rates()['pass_rate']
+    mismatches = [subject for subject, rate in expected.items() if abs(actual[subject] - rate) > 1e-12]
+    print(f"Pass rates match the per-record computation: {'yes' if not mismatches else 'NO ' + str(mismatches)}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Drives the adaptive scheduler through the fault-injecting mock server and
+checks that it behaves as intended: failed searches are retried, a
+Retry-After pauses the whole host, the circuit breaker opens and recovers
+(or gives up on a server that stays down), and roll numbers that never
+succeed end up in the retry queue. Exits with status 1 if a check fails.
+
+    python benchmarks/check_scheduler.py
+"""
+import time
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from mock_resultday import MockResultDayServer
+
+from bise_scheduler import AdaptiveScheduler, CircuitBreaker, RetryPolicy, ServerUnavailableError, run_scheduled
+from bise_scraper import ResultFetcher
+
+# Backoff short enough to keep the checks quick
+FAST_RETRIES = dict(base_delay=0.01, max_delay=0.05)
+
+
+def roll_numbers(count, first=520001):
+    return [str(roll) for roll in range(first, first + count)]
+
+
+def crawl(server, rolls, scheduler, fetch=None):
+    """
+    Returns:
+        tuple: (rolls with a result, {roll: error} for the rolls reported as failed)
+    """
+    failures = {}
+    results = run_scheduled(rolls, fetch or ResultFetcher(server.url), scheduler,
+                            on_failure=lambda roll_no, error: failures.__setitem__(roll_no, error))
+    return [roll_no for roll_no, result in results if result], failures
+
+
+def check_retries():
+    with MockResultDayServer(error_rate=0.3, seed=1) as server:
+        scheduler = AdaptiveScheduler(max_concurrency=8, retry_policy=RetryPolicy(max_attempts=10, **FAST_RETRIES),
+                                      breaker=CircuitBreaker(failure_threshold=10 ** 6))
+        rolls = roll_numbers(100)
+        found, failures = crawl(server, rolls, scheduler)
+    yield "every roll found despite 30% errors", found == rolls and not failures
+    yield "one retry per injected error", scheduler.stats["retries"] == server.error_count > 0
+    yield "retry queue empty", scheduler.retry_queue == []
+
+
+def check_retry_queue():
+    with MockResultDayServer(error_rate=0.6, seed=2) as server:
+        scheduler = AdaptiveScheduler(max_concurrency=8, retry_policy=RetryPolicy(max_attempts=2, **FAST_RETRIES),
+                                      breaker=CircuitBreaker(failure_threshold=10 ** 6))
+        rolls = roll_numbers(100)
+        found, failures = crawl(server, rolls, scheduler)
+    queued = set(scheduler.retry_queue)
+    yield "some rolls used up their attempts", bool(queued)
+    yield "retry queue holds exactly the failed rolls", queued == set(failures) and len(queued) == len(failures)
+    yield "every roll either found or queued", sorted(set(found) | queued) == rolls and not set(found) & queued
+    yield "one request per attempt", \
+        scheduler.stats["attempts"] == server.post_count and scheduler.stats["retries"] >= len(queued)
+
+
+def check_retry_after():
+    with MockResultDayServer(error_rate=1.0, retry_after=1) as server:
+        started = []
+        fetcher = ResultFetcher(server.url)
+
+        def fetch(roll_no):
+            started.append(time.monotonic())
+            try:
+                return fetcher(roll_no)
+            finally:
+                # Only the very first search is refused
+                server.error_rate = 0.0
+
+        scheduler = AdaptiveScheduler(max_concurrency=1, initial_concurrency=1,
+                                      retry_policy=RetryPolicy(max_attempts=3, **FAST_RETRIES))
+        found, failures = crawl(server, roll_numbers(3), scheduler, fetch)
+    gap = started[1] - started[0] if len(started) > 1 else 0.0
+    yield f"host paused for Retry-After (next request after {gap:.2f} s)", gap >= 0.95
+    yield "all rolls found after the pause", len(found) == 3 and not failures
+
+
+def check_breaker_recovers():
+    with MockResultDayServer(error_rate=1.0) as server:
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.3)
+        fetcher = ResultFetcher(server.url)
+
+        def fetch(roll_no):
+            # The server is back by the time the breaker sends its first probe
+            if breaker.open_count:
+                server.error_rate = 0.0
+            return fetcher(roll_no)
+
+        scheduler = AdaptiveScheduler(max_concurrency=4, retry_policy=RetryPolicy(max_attempts=10, **FAST_RETRIES),
+                                      breaker=breaker)
+        rolls = roll_numbers(30)
+        found, failures = crawl(server, rolls, scheduler, fetch)
+    yield "breaker opened", breaker.open_count >= 1
+    yield "breaker closed again after a good probe", breaker.state == CircuitBreaker.CLOSED
+    yield "every roll found after recovery", found == rolls and not failures
+
+
+def check_breaker_gives_up():
+    with MockResultDayServer(error_rate=1.0) as server:
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.2, max_failed_probes=2)
+        scheduler = AdaptiveScheduler(max_concurrency=4, retry_policy=RetryPolicy(max_attempts=5, **FAST_RETRIES),
+                                      breaker=breaker)
+        rolls = roll_numbers(30)
+        started = time.monotonic()
+        found, failures = crawl(server, rolls, scheduler)
+        elapsed = time.monotonic() - started
+    yield f"breaker gave up and the run ended ({elapsed:.1f} s)", breaker.gave_up and elapsed < 10
+    yield "every roll in the retry queue", sorted(scheduler.retry_queue) == rolls and not found
+    yield "unfetched rolls reported as server unavailable", \
+        any(isinstance(error, ServerUnavailableError) for error in failures.values())
+    yield f"no request sent once open but the probes ({server.post_count} of {len(rolls) * 5} possible)", \
+        server.post_count < len(rolls) * 2
+
+
+def main():
+    checks = [check_retries, check_retry_queue, check_retry_after, check_breaker_recovers, check_breaker_gives_up]
+    failed = 0
+    for check in checks:
+        print(check.__name__)
+        for description, passed in check():
+            print(f"  {'ok  ' if passed else 'FAIL'} {description}")
+            failed += not passed
+    if failed:
+        print(f"{failed} checks failed.")
+        raise SystemExit(1)
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Shared setup for the benchmark scripts: puts the repository root on sys.path
+so the bise_* modules can be imported when a script is run directly.
+"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
@@ -0,0 +1,284 @@
+"""
+A local stand-in for the BISE result day page (resultday.aspx).
+
+It answers the GET with an ASP.NET style form carrying __VIEWSTATE and
+__EVENTVALIDATION, and answers the POST with a result page laid out like the
+real TblResult table, so the scraper can be exercised without touching the
+board server.
+
+Run it on its own with:
+    python benchmarks/mock_resultday.py --port 8000 --latency 0.05
+"""
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+SUBJECTS = [
+    ("URDU", 75),
+    ("ENGLISH", 75),
+    ("ISLAMIYAT (COMPULSORY)", 50),
+    ("PAKISTAN STUDIES (COMPULSORY)", 50),
+    ("MATHEMATICS", 75),
+    ("PHYSICS", 60),
+    ("CHEMISTRY", 60),
+    ("BIOLOGY", 60),
+    ("TRANSLATION OF THE HOLY QURAN", 50),
+]
+
+VIEWSTATE = "dDwtMTA4NzYyNzU1Mjs7Pg" * 40
+EVENTVALIDATION = "/wEWBALs7ckEAu6M6PcB" * 8
+
+FORM_PAGE = """<!DOCTYPE html>
+<html><head><title>BISE Result Day</title></head>
+<body>
+<form method="post" action="./resultday.aspx" id="form1">
+<input type="hidden" name="__LASTFOCUS" id="__LASTFOCUS" value="" />
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{eventvalidation}" />
+<table>
+<tr><td><input id="RbtSearchType_0" type="radio" name="RbtSearchType" value="Search by Roll No." checked="checked" /></td></tr>
+<tr><td><input name="TxtSearchText" type="text" id="TxtSearchText" /></td></tr>
+<tr><td><input type="submit" name="BtnShowResults" value="Show Result" id="BtnShowResults" /></td></tr>
+</table>
+{body}
+</form>
+</body></html>
+"""
+
+RESULT_BODY = """<table id="TblResult" border="1">
+<tr><td colspan="3">BOARD OF INTERMEDIATE AND SECONDARY EDUCATION, SARGODHA</td></tr>
+<tr><td>Roll No</td><td colspan="2"><span id="LblRollNo">{roll_no}</span></td></tr>
+<tr><td>Name</td><td colspan="2"><span id="LblName">{name}</span></td></tr>
+<tr><td>Father Name</td><td colspan="2"><span id="LblFatherName">{father_name}</span></td></tr>
+<tr><th>Subject</th><th>Total Marks</th><th>Marks Obtained</th></tr>
+{rows}
+<tr><td>Result</td><td colspan="2"><span id="lblGazres">{overall}</span></td></tr>
+</table>
+"""
+
+NOT_FOUND_BODY = """<span id="LblMsg">No Record Found.</span>"""
+
+FAIL_CODES = {
+    "URDU": "URU",
+    "ENGLISH": "EGL",
+    "ISLAMIYAT (COMPULSORY)": "ISM",
+    "PAKISTAN STUDIES (COMPULSORY)": "PKS",
+    "MATHEMATICS": "MAT",
+    "PHYSICS": "PHY",
+    "CHEMISTRY": "CHM",
+    "BIOLOGY": "BIO",
+    "TRANSLATION OF THE HOLY QURAN": "THQ",
+}
+
+
+def build_student(roll_no):
+    """
+    Builds a deterministic fake student for a roll number.
+
+    Args:
+        roll_no (int): The roll number.
+
+    Returns:
+        tuple: (name, father_name, list of (subject, total, obtained), overall result)
+    """
+    rng = random.Random(roll_no)
+    subjects = []
+    failed = []
+    for subject, total in SUBJECTS:
+        obtained = rng.randint(total // 5, total)
+        subjects.append((subject, total, obtained))
+        if obtained < total * 0.33:
+            failed.append(FAIL_CODES[subject] + rng.choice(["", "I", "II"]))
+    if failed:
+        overall = "FAIL " + " ".join(failed)
+    else:
+        overall = "PASS " + str(sum(obtained for _, _, obtained in subjects))
+    name = "STUDENT " + str(roll_no)
+    father_name = "FATHER OF " + str(roll_no)
+    return name, father_name, subjects, overall
+
+
+def render_result_page(roll_no):
+    """
+    Renders the HTML returned after a successful roll number search.
+
+    Args:
+        roll_no (int): The roll number.
+
+    Returns:
+        str: The result page HTML.
+    """
+    name, father_name, subjects, overall = build_student(roll_no)
+    rows = "\n".join(
+        f"<tr><td>{subject}</td><td>{total}</td><td>{obtained}</td></tr>"
+        for subject, total, obtained in subjects
+    )
+    body = RESULT_BODY.format(roll_no=roll_no, name=name, father_name=father_name, rows=rows, overall=overall)
+    return FORM_PAGE.format(viewstate=VIEWSTATE, eventvalidation=EVENTVALIDATION, body=body)
+
+
+class MockResultDayServer:
+    """
+    Runs the stand-in result page on a background thread.
+
+    Usage:
+        with MockResultDayServer(latency=0.05, valid_ranges=[(520001, 520500)]) as server:
+            retrieve_bise_result("520001", base_url=server.url)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, valid_ranges=None,
+                 error_rate=0.0, error_status=503, retry_after=None, seed=None, hole_rate=0.0,
+                 roll_field="TxtSearchText"):
+        """
+        Args:
+            host (str): Interface to listen on.
+            port (int): Port to listen on. 0 picks a free port.
+            latency (float): Seconds each response is delayed by, simulating a slow server.
+            valid_ranges (list of tuple or None): Inclusive (start, end) roll number ranges
+                                                  that have results. None means every roll number does.
+            error_rate (float): Fraction of searches answered with `error_status` instead of a result.
+            error_status (int): HTTP status used for injected faults (e.g. 503 or 429).
+            retry_after (float or None): Retry-After seconds sent with injected faults.
+            seed (int or None): Seed for the fault injection, for repeatable runs.
+            hole_rate (float): Fraction of rolls inside `valid_ranges` that still have no
+                               result, like candidates who were absent.
+            roll_field (str): Search form field the roll number is read from, to stand in
+                              for boards whose form differs.
+        """
+        self.latency = latency
+        self.valid_ranges = valid_ranges
+        self.hole_rate = hole_rate
+        self.roll_field = roll_field
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.error_count = 0
+        self._rng = random.Random(seed)
+        self.request_count = 0
+        self.get_count = 0
+        self.post_count = 0
+        self._count_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/biseresultday/resultday.aspx"
+
+    def has_result(self, roll_no):
+        if self.hole_rate and random.Random(roll_no * 7919).random() < self.hole_rate:
+            return False
+        if self.valid_ranges is None:
+            return True
+        return any(start <= roll_no <= end for start, end in self.valid_ranges)
+
+    def inject_fault(self):
+        """
+        Decides whether the current search should fail.
+        """
+        with self._count_lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.error_count += 1
+                return True
+        return False
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, html, retry_after=None):
+                body = html.encode("utf-8")
+                self.send_response(status)
+                if retry_after is not None:
+                    self.send_header("Retry-After", str(retry_after))
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _count(self):
+                with server._count_lock:
+                    server.request_count += 1
+                    if self.command == "GET":
+                        server.get_count += 1
+                    else:
+                        server.post_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+            def do_GET(self):
+                self._count()
+                self._send(200, FORM_PAGE.format(viewstate=VIEWSTATE, eventvalidation=EVENTVALIDATION, body=""))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                self._count()
+                if server.inject_fault():
+                    self._send(server.error_status, "<html><body>Server Too Busy</body></html>",
+                               retry_after=server.retry_after)
+                    return
+                if form.get("__VIEWSTATE", [""])[0] != VIEWSTATE or \
+                        form.get("__EVENTVALIDATION", [""])[0] != EVENTVALIDATION:
+                    self._send(500, "<html><body>Invalid postback or callback argument.</body></html>")
+                    return
+                roll_text = form.get(server.roll_field, [""])[0].strip()
+                if roll_text.isdigit() and server.has_result(int(roll_text)):
+                    self._send(200, render_result_page(int(roll_text)))
+                else:
+                    self._send(200, FORM_PAGE.format(viewstate=VIEWSTATE, eventvalidation=EVENTVALIDATION,
+                                                     body=NOT_FOUND_BODY))
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in of resultday.aspx.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay every response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of searches that fail.")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of failed searches.")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with failures.")
+    args = parser.parse_args()
+
+    server = MockResultDayServer(host=args.host, port=args.port, latency=args.latency, error_rate=args.error_rate,
+                                 error_status=args.error_status, retry_after=args.retry_after)
+    print(f"Serving mock result page at {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
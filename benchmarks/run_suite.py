@@ -0,0 +1,192 @@
+"""
+Runs the hot paths of the scraper against local stand-ins and reports one
+number per path, so a change can be checked for regressions offline:
+
+* requests/sec of the crawl path the command line uses (ResultFetcher with its
+  page cache, driven by AdaptiveScheduler) against the mock result server
+* parse time per result page
+* export time per 10k rows and peak memory of append_to_excel
+
+    python benchmarks/run_suite.py --save baseline.json
+    python benchmarks/run_suite.py --baseline baseline.json --tolerance 0.25
+
+With --baseline the script exits with status 1 if any metric got worse by
+more than the tolerance.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+from bench_export import synthetic_records
+from bench_parse import PAGES_DIR, load_corpus
+from mock_resultday import MockResultDayServer, render_result_page
+
+from bise_parser import parse_result_page
+from bise_scheduler import AdaptiveScheduler, RetryPolicy, run_scheduled
+from bise_scraper import ResultFetcher
+
+SCRIPT_PATH = os.path.join(common.REPO_ROOT, "bise-sargodha-matric-results-scraper.py")
+
+# Metric name -> (unit, True if a larger value is better)
+METRICS = {
+    "requests_per_sec": ("req/s", True),
+    "parse_ms_per_page": ("ms", False),
+    "export_sec_per_10k_rows": ("s", False),
+    "export_peak_mb": ("MB", False),
+    "max_rss_mb": ("MB", False),
+}
+
+
+def load_cli_module():
+    """
+    Imports the command line script, whose file name is not a valid module name.
+    """
+    spec = importlib.util.spec_from_file_location("bise_cli", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_fetch(rolls, concurrency, latency, error_rate, seed):
+    """
+    Crawls `rolls` roll numbers the way the command line does, retries and
+    page cache included, and returns the POST requests per second the mock
+    server received.
+    """
+    roll_numbers = [str(520001 + i) for i in range(rolls)]
+    scheduler = AdaptiveScheduler(
+        max_concurrency=concurrency,
+        initial_concurrency=max(1, concurrency // 2),
+        retry_policy=RetryPolicy(max_attempts=5),
+    )
+    with MockResultDayServer(latency=latency, error_rate=error_rate, seed=seed) as server, \
+            tempfile.TemporaryDirectory() as cache_dir:
+        fetcher = ResultFetcher(base_url=server.url, cache_dir=cache_dir)
+        started = time.perf_counter()
+        run_scheduled(roll_numbers, fetcher, scheduler)
+        elapsed = time.perf_counter() - started
+        fetcher.close()
+        if scheduler.retry_queue:
+            raise RuntimeError(f"{len(scheduler.retry_queue)} roll numbers could not be fetched")
+        return server.post_count / elapsed
+
+
+def bench_parse(iterations):
+    """
+    Returns the average milliseconds parse_result_page needs per page, over
+    the saved page corpus and a few pages rendered by the mock server.
+    """
+    pages = list(load_corpus(PAGES_DIR).values())
+    pages.extend(render_result_page(520001 + i) for i in range(8))
+    started = time.perf_counter()
+    for i in range(iterations):
+        parse_result_page(pages[i % len(pages)])
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def bench_export(rows):
+    """
+    Appends `rows` records to a workbook that already holds `rows` records,
+    the way a resumed crawl saves its results. The timing runs untraced;
+    tracemalloc then measures the peak memory of a second identical append.
+
+    Returns:
+        tuple: (seconds per 10k appended rows, peak MB)
+    """
+    cli = load_cli_module()
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "results.xlsx")
+
+        def append_once():
+            cli.export_to_excel(synthetic_records(rows), filename)
+            new_rows = list(synthetic_records(rows, first_roll_no=520001 + rows))
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if not cli.append_to_excel(new_rows, filename):
+                    raise RuntimeError("append_to_excel failed")
+            return time.perf_counter() - started
+
+        elapsed = append_once()
+        tracemalloc.start()
+        append_once()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed / rows * 10000, peak / 1e6
+
+
+def max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the names of metrics that are worse than the baseline by more than `tolerance`.
+    """
+    regressions = []
+    for name, (_, higher_is_better) in METRICS.items():
+        if name not in baseline or name not in results or not baseline[name]:
+            continue
+        change = (results[name] - baseline[name]) / baseline[name]
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and check it against a baseline.")
+    parser.add_argument("--rolls", type=int, default=300, help="Roll numbers fetched from the mock server.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent lookups in the fetch benchmark.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated server latency in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of searches the mock server fails.")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the mock server's fault injection.")
+    parser.add_argument("--iterations", type=int, default=3000, help="Pages parsed in the parse benchmark.")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows appended in the export benchmark.")
+    parser.add_argument("--save", help="Write the results to this JSON file, e.g. to use as a baseline.")
+    parser.add_argument("--baseline", help="JSON file of earlier results to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown before a metric counts as a regression (default: 0.25).")
+    args = parser.parse_args()
+
+    results = {"requests_per_sec": bench_fetch(args.rolls, args.concurrency, args.latency, args.error_rate, args.seed)}
+    results["parse_ms_per_page"] = bench_parse(args.iterations)
+    results["export_sec_per_10k_rows"], results["export_peak_mb"] = bench_export(args.rows)
+    results["max_rss_mb"] = max_rss_mb()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    print(f"{'metric':<24} {'value':>10} {'unit':<6}" + (f" {'baseline':>10} {'change':>8}" if baseline else ""))
+    for name, (unit, _) in METRICS.items():
+        line = f"{name:<24} {results[name]:>10.3f} {unit:<6}"
+        if baseline and baseline.get(name):
+            line += f" {baseline[name]:>10.3f} {(results[name] - baseline[name]) / baseline[name]:>+8.1%}"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as results_file:
+            json.dump(results, results_file, indent=2)
+        print(f"Results saved to {args.save}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for name in regressions:
+            print(f"REGRESSION: {name} is more than {args.tolerance:.0%} worse than the baseline")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
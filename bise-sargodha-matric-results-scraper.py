@@ -1,368 +1,72 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 import os
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment
-from openpyxl.utils import get_column_letter
-import re # Import the re module for regular expressions
-
-def retrieve_bise_result(roll_no):
-    """
-    Retrieves the BISE Sargodha Matric result for a given roll number.
-    It first performs a GET request to fetch the latest __VIEWSTATE and __EVENTVALIDATION
-    tokens, then uses them in a POST request to get the result.
-
-    Args:
-        roll_no (str): The roll number to search for.
-
-    Returns:
-        dict or None: A dictionary containing the extracted student's result data
-                      in the desired column format, or None if the request fails
-                      or data cannot be parsed.
-    """
-    base_url = "http://119.159.230.2/biseresultday/resultday.aspx"
-
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
-    try:
-        # Step 1: Perform a GET request to get the initial page and extract tokens
-        print(f"Fetching initial page for Roll No: {roll_no} to get tokens...")
-        get_response = requests.get(base_url, headers=headers)
-        get_response.raise_for_status() # Raise an HTTPError for bad responses
-
-        get_soup = BeautifulSoup(get_response.text, 'html.parser')
-
-        # Extract __VIEWSTATE and __EVENTVALIDATION
-        viewstate = get_soup.find('input', {'name': '__VIEWSTATE'})['value'] if get_soup.find('input', {'name': '__VIEWSTATE'}) else ''
-        eventvalidation = get_soup.find('input', {'name': '__EVENTVALIDATION'})['value'] if get_soup.find('input', {'name': '__EVENTVALIDATION'}) else ''
-
-        if not viewstate or not eventvalidation:
-            print(f"Error: Could not find __VIEWSTATE or __EVENTVALIDATION on the initial page for {roll_no}.")
-            return None
-
-        # Step 2: Prepare the payload for the POST request with fresh tokens
-        payload = {
-            "__LASTFOCUS": "",
-            "__EVENTTARGET": "",
-            "__EVENTARGUMENT": "",
-            "__VIEWSTATE": viewstate,
-            "__EVENTVALIDATION": eventvalidation,
-            "RbtSearchType": "Search by Roll No.",
-            "TxtSearchText": roll_no,
-            "BtnShowResults": "Show Result"
-        }
-
-        # Step 3: Perform the POST request to retrieve the result
-        print(f"Sending POST request for Roll No: {roll_no}...")
-        post_response = requests.post(base_url, data=payload, headers=headers)
-        post_response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-
-        soup = BeautifulSoup(post_response.text, 'html.parser')
-
-        # Initialize student record with default empty values for all desired columns
-        # Subject order changed: Computer Science and Biology first, then other Science subjects, then Arts subjects
-        student_record = {
-            'Roll-No': '',
-            'Candidate Name': '',
-            'Father Name': '',
-            'Computer Science': '', # Moved to the start of science subjects
-            'Biology': '',         # Moved to the start of science subjects
-            'Mathematics': '',
-            'Physics': '',
-            'Chemistry': '',
-            'Islamiyat': '',
-            'Pakistan Studies': '',
-            'Urdu': '',
-            'English': '',
-            'THQ': '', # Translation of Holy Quran
-            'overall result': ''
-        }
-
-        # Extract student information and populate the student_record
-        student_record['Roll-No'] = soup.find('span', id='LblRollNo').get_text(strip=True) if soup.find('span', id='LblRollNo') else ''
-        student_record['Candidate Name'] = soup.find('span', id='LblName').get_text(strip=True) if soup.find('span', id='LblName') else ''
-        student_record['Father Name'] = soup.find('span', id='LblFatherName').get_text(strip=True) if soup.find('span', id='LblFatherName') else ''
-        student_record['overall result'] = soup.find('span', id='lblGazres').get_text(strip=True) if soup.find('span', id='lblGazres') else ''
-
-        # Check if result data is actually present (e.g., if a valid roll number was entered)
-        if not student_record['Roll-No']:
-            print(f"No result found for Roll No: {roll_no}. It might be an invalid roll number or the page structure changed.")
-            return None
-
-        # Define a mapping from subject names in HTML to desired Excel column names
-        subject_column_map = {
-            "ISLAMIYAT (COMPULSORY)": "Islamiyat",
-            "PAKISTAN STUDIES (COMPULSORY)": "Pakistan Studies",
-            "URDU": "Urdu",
-            "ENGLISH": "English",
-            "MATHEMATICS": "Mathematics",
-            "PHYSICS": "Physics",
-            "CHEMISTRY": "Chemistry",
-            "COMPUTER SCIENCE": "Computer Science",
-            "TRANSLATION OF THE HOLY QURAN": "THQ",
-            "BIOLOGY": "Biology"
-        }
-
-        # Extract subject marks
-        result_table = soup.find('table', id='TblResult')
-        if result_table:
-            # Skip the first 5 rows which are headers/student info
-            rows = result_table.find_all('tr')[5:]
-            for row in rows:
-                cols = row.find_all(['td', 'th'])
-                if len(cols) >= 3: # Ensure at least subject name and marks obtained
-                    subject_name_html = cols[0].get_text(strip=True)
-                    marks_obtained_html = cols[2].get_text(strip=True)
-
-                    # Map the HTML subject name to our desired column name
-                    excel_column_name = subject_column_map.get(subject_name_html)
-
-                    if excel_column_name:
-                        student_record[excel_column_name] = marks_obtained_html
-        return student_record
-
-    except requests.exceptions.RequestException as e:
-        print(f"Error during request for Roll No {roll_no}: {e}")
-        return None
-    except Exception as e:
-        print(f"An error occurred during parsing or data extraction for Roll No {roll_no}: {e}")
-        return None
-
-def append_to_excel(data, filename="bise_results.xlsx"):
+import itertools
+import argparse
+import contextlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from bise_checkpoint import ERROR, FOUND, NOT_FOUND, CheckpointStore, roll_numbers_in_excel
+from bise_diff import RECHECK_SELECTIONS, ResultDiff, select_recheck_rolls, write_change_log
+from bise_discovery import RollRangeIndex, discover_valid_ranges
+from bise_excel import export_checkpoint_to_excel, export_to_excel, read_excel_records
+from bise_metrics import ProgressDisplay, metrics
+from bise_page_cache import PageCache
+from bise_parser import RECORD_COLUMNS, parse_result_page
+from bise_profiles import ProfileCrawl, crawl_profiles, load_profiles
+from bise_result_store import ResultStore
+from bise_scheduler import AdaptiveScheduler, RetryPolicy, run_scheduled
+from bise_scraper import ResultFetcher
+from bise_session import BASE_URL
+from bise_shards import leftover_shards, merge_shards, run_sharded_crawl
+
+logger = logging.getLogger("bise")
+
+def append_to_excel(data, filename="bise_results.xlsx", columns=RECORD_COLUMNS):
     """
     Appends a list of dictionaries (student data) to an Excel file.
     Creates the file with headers if it doesn't exist.
     Highlights failed subject cells with a light red background.
     Applies enhanced Excel formatting.
 
+    A record whose Roll-No is already in the file replaces that row where it
+    stands instead of being added again, so the sheet never holds duplicates.
+
+    The existing rows are streamed out of the old file and written together
+    with the new ones through the write-only exporter, so memory use stays
+    bounded however large the sheet grows.
+
     Args:
         data (list of dict): List of dictionaries, where each dict is a student's record.
         filename (str): The name of the Excel file.
+        columns (list of str): Column order of the sheet.
+
+    Returns:
+        bool: True if the file was written, False otherwise.
     """
     if not data:
         print("No data to append.")
-        return
+        return False
 
-    # Define the desired column order explicitly (Computer Science and Biology first, then other Science subjects, then Arts subjects)
-    column_order = [
-        'Roll-No', 'Candidate Name', 'Father Name', 'Computer Science', 'Biology',
-        'Mathematics', 'Physics', 'Chemistry', 'Islamiyat', 'Pakistan Studies', 'Urdu',
-        'English', 'THQ', 'overall result'
-    ]
-
-    df_new = pd.DataFrame(data, columns=column_order)
-
-    # Define the light red fill style
-    red_fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-
-    # Mapping of common failed subject abbreviations/keywords to Excel column names
-    failed_subject_keywords_map = {
-        "BIO": "Biology",
-        "PHY": "Physics",
-        "CHM": "Chemistry",
-        "EGL": "English",
-        "URU": "Urdu",
-        "MAT": "Mathematics",
-        "THQ": "THQ",
-        "PKS": "Pakistan Studies",
-        "ISM": "Islamiyat",
-        "CSC": "Computer Science",
-        "CS": "Computer Science"
-    }
-
-    if os.path.exists(filename):
-        try:
-            # Load the existing workbook and get the target sheet
-            book = load_workbook(filename)
-            sheet_name = 'BISE Sargodha Matric Results'
-            
-            # If the sheet does not exist, create it. Otherwise, get it.
-            if sheet_name not in book.sheetnames:
-                sheet = book.create_sheet(sheet_name)
-            else:
-                sheet = book[sheet_name]
-
-            # Calculate the starting row for new data
-            start_row = sheet.max_row
-
-            # Use ExcelWriter with the loaded book
-            with pd.ExcelWriter(filename, engine='openpyxl', mode='a', if_sheet_exists='overlay', book=book) as writer:
-                # Write new data to the existing sheet, starting after the last row
-                df_new.to_excel(writer, sheet_name=sheet_name, index=False, header=False, startrow=start_row)
-
-            # Apply highlighting to the newly added rows using the 'sheet' object
-            # Iterate through the new rows in the DataFrame to apply highlighting
-            for r_idx, row_data in df_new.iterrows():
-                current_excel_row = start_row + r_idx + 1 # +1 because Excel rows are 1-indexed
-                overall_result_string = str(row_data.get('overall result', '')).upper() # Get overall result and convert to uppercase
-
-                # Identify failed subjects from the overall result string
-                failed_subjects = set()
-                # Split the overall_result_string into words/tokens
-                words = overall_result_string.replace('/', ' ').replace('-', ' ').split()
-                for word in words:
-                    # Start with the word, strip whitespace, and convert to uppercase
-                    clean_word = word.strip()
-                    
-                    # Remove '(PR)' suffix
-                    clean_word = clean_word.replace('(PR)', '')
-
-                    # Use regex to remove 'II' then 'I' suffixes
-                    clean_word = re.sub(r'II$', '', clean_word)
-                    clean_word = re.sub(r'I$', '', clean_word)
-                    
-                    if clean_word in failed_subject_keywords_map:
-                        failed_subjects.add(failed_subject_keywords_map[clean_word])
-
-                # Apply highlighting based on identified failed subjects
-                for col_name in column_order: # Iterate through all possible subject columns
-                    if col_name in failed_subject_keywords_map.values(): # Check if it's a subject column
-                        if col_name in failed_subjects:
-                            # Get the column index (1-based) for the current subject column
-                            col_idx = df_new.columns.get_loc(col_name) + 1
-                            cell = sheet.cell(row=current_excel_row, column=col_idx)
-                            cell.fill = red_fill
-
-            # Reapply header styling, auto-adjust column widths, and freeze panes to the entire sheet
-            header_font = Font(bold=True)
-            header_alignment = Alignment(horizontal='center', vertical='center')
-            for col_idx in range(1, len(column_order) + 1):
-                cell = sheet.cell(row=1, column=col_idx)
-                cell.font = header_font
-                cell.alignment = header_alignment
-
-            for col in sheet.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                sheet.column_dimensions[column].width = adjusted_width
-
-            sheet.freeze_panes = 'C2' # Freezes row 1 and columns A, B
-
-            # Save the workbook after all modifications
-            book.save(filename)
+    try:
+        if os.path.exists(filename):
+            updates = {str(record.get('Roll-No', '')).strip(): record for record in data}
+            existing = (updates.pop(record['Roll-No'].strip(), record)
+                        for record in read_excel_records(filename, columns=columns))
+            # Replaced rows are taken out of `updates` while the old file streams past,
+            # and chain() only reads what is left of it once that is done
+            export_to_excel(itertools.chain(existing, updates.values()), filename, columns=columns)
             print(f"Data appended to '{filename}' with highlighting and formatting successfully.")
-
-        except Exception as e:
-            print(f"Error appending to existing Excel file with highlighting: {e}")
-            # If an error occurs during append, try creating a new file as a fallback
-            print("Attempting to create a new file instead due to append error...")
-            # Fallback to creating a new file if append fails
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                df_new.to_excel(writer, sheet_name='BISE Sargodha Matric Results', index=False)
-                sheet = writer.sheets['BISE Sargodha Matric Results']
-                
-                # Apply header styling
-                header_font = Font(bold=True)
-                header_alignment = Alignment(horizontal='center', vertical='center')
-                for col_idx in range(1, len(column_order) + 1):
-                    cell = sheet.cell(row=1, column=col_idx)
-                    cell.font = header_font
-                    cell.alignment = header_alignment
-
-                # Auto-adjust column widths
-                for col in sheet.columns:
-                    max_length = 0
-                    column = col[0].column_letter
-                    for cell in col:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = (max_length + 2)
-                    sheet.column_dimensions[column].width = adjusted_width
-
-                # Freeze panes
-                sheet.freeze_panes = 'C2'
-
-                # Apply highlighting to all rows in the new file (including the first row of data)
-                for r_idx in range(2, sheet.max_row + 1): # Start from row 2 (after header)
-                    row_data_from_df = df_new.iloc[r_idx - 2] # Adjust for 0-indexed DataFrame vs 1-indexed sheet
-                    overall_result_string = str(row_data_from_df.get('overall result', '')).upper()
-                    
-                    failed_subjects = set()
-                    words = overall_result_string.replace('/', ' ').replace('-', ' ').split()
-                    for word in words:
-                        clean_word = word.strip()
-                        clean_word = clean_word.replace('(PR)', '')
-                        clean_word = re.sub(r'II$', '', clean_word)
-                        clean_word = re.sub(r'I$', '', clean_word)
-                        if clean_word in failed_subject_keywords_map:
-                            failed_subjects.add(failed_subject_keywords_map[clean_word])
-
-                    for col_name in column_order:
-                        if col_name in failed_subject_keywords_map.values():
-                            if col_name in failed_subjects:
-                                col_idx = df_new.columns.get_loc(col_name) + 1
-                                cell = sheet.cell(row=r_idx, column=col_idx)
-                                cell.fill = red_fill
-            print(f"New Excel file '{filename}' created as fallback and data saved with highlighting and formatting.")
-
-    else:
-        # Create new file and apply conditional formatting
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            df_new.to_excel(writer, sheet_name='BISE Sargodha Matric Results', index=False)
-
-            sheet = writer.sheets['BISE Sargodha Matric Results']
-
-            # Apply header styling
-            header_font = Font(bold=True)
-            header_alignment = Alignment(horizontal='center', vertical='center')
-            for col_idx in range(1, len(column_order) + 1):
-                cell = sheet.cell(row=1, column=col_idx)
-                cell.font = header_font
-                cell.alignment = header_alignment
-
-            # Auto-adjust column widths
-            for col in sheet.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                sheet.column_dimensions[column].width = adjusted_width
-
-            # Freeze panes
-            sheet.freeze_panes = 'C2'
-
-            # Apply conditional formatting to all rows in the new file
-            # Start from row 2 (after header)
-            for r_idx in range(2, sheet.max_row + 1):
-                # Adjust for 0-indexed DataFrame vs 1-indexed sheet
-                row_data_from_df = df_new.iloc[r_idx - 2]
-                overall_result_string = str(row_data_from_df.get('overall result', '')).upper()
-                
-                failed_subjects = set()
-                words = overall_result_string.replace('/', ' ').replace('-', ' ').split()
-                for word in words:
-                    clean_word = word.strip()
-                    clean_word = clean_word.replace('(PR)', '')
-                    clean_word = re.sub(r'II$', '', clean_word)
-                    clean_word = re.sub(r'I$', '', clean_word)
-                    if clean_word in failed_subject_keywords_map:
-                        failed_subjects.add(failed_subject_keywords_map[clean_word])
-
-                for col_name in column_order:
-                    if col_name in failed_subject_keywords_map.values():
-                        if col_name in failed_subjects:
-                            col_idx = df_new.columns.get_loc(col_name) + 1
-                            cell = sheet.cell(row=r_idx, column=col_idx)
-                            cell.fill = red_fill
-        print(f"New Excel file '{filename}' created and data saved with highlighting and formatting.")
+        else:
+            export_to_excel(data, filename, columns=columns)
+            print(f"New Excel file '{filename}' created and data saved with highlighting and formatting.")
+        return True
+    except Exception as e:
+        # The exporter only replaces the file once the new one is fully written,
+        # so the existing workbook is left untouched here
+        print(f"Error writing results to Excel file '{filename}': {e}")
+        return False
 
 def get_roll_number_range():
     """
@@ -389,27 +93,560 @@ def get_roll_number_range():
         except ValueError:
             print("Invalid input. Please enter valid integer roll numbers.")
 
-def main():
+def parse_arguments():
     """
-    Main function to orchestrate the retrieval and saving of BISE results.
+    Parses the command line options.
+
+    Returns:
+        argparse.Namespace: The parsed options. start/end are None when they
+                            should be asked for interactively.
+    """
+    parser = argparse.ArgumentParser(description="Scrape BISE Sargodha Matric results into an Excel file.")
+    parser.add_argument("--start", type=int, help="Starting roll number (asked interactively if omitted).")
+    parser.add_argument("--end", type=int, help="Ending roll number (asked interactively if omitted).")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Maximum number of roll numbers fetched at the same time (default: 8). "
+                             "The crawl starts lower and adapts to how fast the server answers.")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Maximum roll numbers requested per second from the board server (default: no limit).")
+    parser.add_argument("--max-attempts", type=int, default=5,
+                        help="Tries per roll number before it is left for the next run (default: 5).")
+    parser.add_argument("--url", default=BASE_URL, help="Result page URL (default: the BISE Sargodha result day page).")
+    parser.add_argument("--output", default="bise_matric_results.xlsx", help="Excel file to create or update.")
+    parser.add_argument("--checkpoint", default="bise_checkpoint.sqlite3",
+                        help="SQLite file recording every roll already looked up, used to resume interrupted runs.")
+    parser.add_argument("--retry-not-found", action="store_true",
+                        help="Look up rolls again that returned no result in an earlier run.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Split the range across this many processes, each with its own fetch pipeline (default: 1).")
+    parser.add_argument("--shard-dir", default="bise_shards",
+                        help="Directory for the per-process result shards of a --workers run.")
+    parser.add_argument("--discover", action="store_true",
+                        help="Probe the range for populated blocks and fetch densely only inside them.")
+    parser.add_argument("--discover-step", type=int, default=50,
+                        help="Sampling stride of --discover; should not exceed the smallest block (default: 50).")
+    parser.add_argument("--gap-tolerance", type=int, default=10,
+                        help="Consecutive missing rolls that end a block during --discover (default: 10).")
+    parser.add_argument("--index", default="bise_roll_index.json",
+                        help="JSON file of roll number ranges known to hold results, updated by --discover.")
+    parser.add_argument("--use-index", action="store_true",
+                        help="Only fetch rolls inside the ranges already recorded in the index file.")
+    parser.add_argument("--no-excel", action="store_true",
+                        help="Only save results to the checkpoint file; build the Excel file later with --build-excel.")
+    parser.add_argument("--build-excel", action="store_true",
+                        help="Build the Excel file from every result in the checkpoint file and exit.")
+    parser.add_argument("--cache-dir", default="bise_page_cache",
+                        help="Directory keeping a compressed copy of every fetched result page.")
+    parser.add_argument("--cache-size", type=int, default=512,
+                        help="Size limit of the page cache in MB; least recently used pages are dropped (default: 512).")
+    parser.add_argument("--no-cache", action="store_true", help="Do not keep copies of the fetched result pages.")
+    parser.add_argument("--exam-session", default=None,
+                        help="Name under which pages are cached, e.g. 'matric-2025' (default: the result page URL).")
+    parser.add_argument("--reparse", action="store_true",
+                        help="Parse the cached pages again without contacting the server, then rebuild the Excel file.")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print pass rates per subject, top students and failure distributions, then exit.")
+    parser.add_argument("--top", type=int, default=10, help="Number of top students listed by --stats (default: 10).")
+    parser.add_argument("--store", default="bise_results.npz",
+                        help="Compact copy of the results used by --stats, rebuilt when the checkpoint changes.")
+    parser.add_argument("--profiles", default=None,
+                        help="JSON file of board/session profiles to crawl at the same time, each into its own "
+                             "<name>.xlsx and <name>.sqlite3 checkpoint.")
+    parser.add_argument("--profile-dir", default=".",
+                        help="Directory for the Excel and checkpoint files of a --profiles run (default: current).")
+    parser.add_argument("--recheck", default=None, choices=sorted(RECHECK_SELECTIONS),
+                        help="Diff mode: fetch stored rolls again (e.g. 'failed' after rechecking or supplementary "
+                             "results) and update only the results that changed. --start/--end narrow the rolls.")
+    parser.add_argument("--change-log", default="bise_changes.csv",
+                        help="CSV file --recheck appends every changed value to (default: bise_changes.csv).")
+    parser.add_argument("--log-level", default="warning", choices=["debug", "info", "warning", "error"],
+                        help="Detail of the per-roll messages: info lists rolls without a result, "
+                             "debug every request (default: warning).")
+    parser.add_argument("--no-progress", action="store_true", help="Do not show the live progress line.")
+    parser.add_argument("--metrics-out", default=None,
+                        help="Write counters and latency histograms of the run to this file.")
+    parser.add_argument("--metrics-format", default="json", choices=["json", "prometheus"],
+                        help="Format of the --metrics-out file (default: json).")
+    args = parser.parse_args()
+
+    if args.build_excel and args.no_excel:
+        parser.error("--build-excel and --no-excel cannot be used together.")
+    if args.reparse and args.no_cache:
+        parser.error("--reparse reads the page cache; leave out --no-cache.")
+    if args.stats and (args.build_excel or args.reparse):
+        parser.error("--stats cannot be combined with --build-excel or --reparse.")
+    if args.top < 1:
+        parser.error("--top must be at least 1.")
+    if args.profiles and (args.build_excel or args.reparse or args.stats or args.discover or args.use_index
+                          or args.workers > 1):
+        parser.error("--profiles cannot be combined with --build-excel, --reparse, --stats, --discover, "
+                     "--use-index or --workers.")
+    if args.cache_size < 1:
+        parser.error("--cache-size must be at least 1.")
+    if (args.start is None) != (args.end is None):
+        parser.error("--start and --end must be given together.")
+    if args.start is not None and (args.start <= 0 or args.start > args.end):
+        parser.error("Roll numbers must be positive and --start cannot be greater than --end.")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1.")
+    if args.max_attempts < 1:
+        parser.error("--max-attempts must be at least 1.")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.discover and args.use_index:
+        parser.error("--discover and --use-index cannot be used together.")
+    if args.discover and args.workers > 1:
+        parser.error("--discover runs in a single process; leave out --workers.")
+    if args.discover_step < 1 or args.gap_tolerance < 1:
+        parser.error("--discover-step and --gap-tolerance must be at least 1.")
+    return args
+
+def build_excel_from_checkpoint(checkpoint, filename):
+    """
+    Rebuilds the formatted Excel file from every result in the checkpoint store.
+    Rows of an existing workbook that the store does not know yet are imported
+    first, so nothing already in the file is dropped.
+
+    Args:
+        checkpoint (CheckpointStore): The store holding the crawled results.
+        filename (str): The Excel file to write.
+
+    Returns:
+        bool: True if the file was written, False otherwise.
+    """
+    try:
+        imported, row_count = export_checkpoint_to_excel(checkpoint, filename)
+        if imported:
+            print(f"Imported {imported} rows from the existing '{filename}'.")
+        print(f"Excel file '{filename}' built with {row_count} results.")
+        return True
+    except Exception as e:
+        print(f"Error building Excel file '{filename}': {e}")
+        return False
+
+def reparse_cached_pages(args, checkpoint):
+    """
+    Parses every cached page of the exam session again and stores the
+    outcomes in the checkpoint, replacing what the original crawl recorded.
+    No requests are sent to the board server.
+
+    Args:
+        args (argparse.Namespace): The parsed command line options.
+        checkpoint (CheckpointStore): Store receiving the reparsed outcomes.
+
+    Returns:
+        int: Number of pages reparsed.
+    """
+    exam_session = args.exam_session or args.url
+    outcomes = []
+    failures = 0
+    with PageCache(args.cache_dir, args.cache_size * 1024 * 1024) as cache:
+        for roll_no, html in cache.pages(exam_session):
+            try:
+                record = parse_result_page(html)
+            except Exception as e:
+                failures += 1
+                logger.warning("Could not parse the cached page of Roll No: %s: %s", roll_no, e)
+                continue
+            outcomes.append((roll_no, FOUND if record else NOT_FOUND, record))
+    checkpoint.record_many(outcomes)
+    found = sum(1 for _, status, _ in outcomes if status == FOUND)
+    print(f"Reparsed {len(outcomes)} cached pages of '{exam_session}': {found} results, "
+          f"{len(outcomes) - found} without a result, {failures} unreadable.")
+    return len(outcomes)
+
+def discover_and_fetch(args, checkpoint, start_roll_no, end_roll_no, fetch, completed):
+    """
+    Runs discovery over the range: samples it, fetches densely inside the
+    populated blocks it finds, and records the blocks in the index file.
+    Rolls already in the checkpoint are answered from it without a request.
+
+    A roll whose lookup failed counts as unknown, not as a miss. If some stay
+    unknown, the blocks may be cut short, so the index file is left as it was.
+
+    Args:
+        args (argparse.Namespace): The parsed command line options.
+        checkpoint (CheckpointStore): Store receiving every lookup.
+        start_roll_no (int): First roll number of the range.
+        end_roll_no (int): Last roll number of the range.
+        fetch (callable): Fetches a list of roll numbers (as strings) into the checkpoint.
+        completed (set of int): Rolls that must not be fetched again (already in the checkpoint or workbook).
     """
-    start_roll_no, end_roll_no = get_roll_number_range()
-    roll_numbers_to_search = [str(roll) for roll in range(start_roll_no, end_roll_no + 1)]
-
-    all_students_results = []
-    for roll_no in roll_numbers_to_search:
-        print(f"Retrieving result for Roll No: {roll_no}...")
-        student_result = retrieve_bise_result(roll_no)
-        if student_result:
-            all_students_results.append(student_result)
+    in_workbook = roll_numbers_in_excel(args.output)
+    requests_made = 0
+    unresolved = set()
+
+    def lookup(roll_numbers):
+        nonlocal requests_made
+        to_fetch = [roll for roll in roll_numbers if roll not in completed]
+        failed = set()
+        if to_fetch:
+            fetch([str(roll) for roll in to_fetch])
+            requests_made += len(to_fetch)
+            failed = checkpoint.with_status_among(to_fetch, ERROR)
+        found = checkpoint.found_among(roll_numbers) | (in_workbook & set(roll_numbers))
+        unresolved.difference_update(roll_numbers)
+        unresolved.update(failed)
+        return {roll: None if roll in failed else roll in found for roll in roll_numbers}
+
+    def report_round(round_number, requested):
+        if round_number == 0:
+            print(f"Sampled {requested} roll numbers every {args.discover_step} rolls.")
+        elif requested:
+            print(f"Discovery round {round_number}: {requested} roll numbers looked up at block edges.")
+
+    blocks, _ = discover_valid_ranges(
+        start_roll_no, end_roll_no, lookup,
+        step=args.discover_step,
+        gap_tolerance=args.gap_tolerance,
+        on_round=report_round,
+    )
+
+    range_size = end_roll_no - start_roll_no + 1
+    if unresolved:
+        print(f"Found {len(blocks)} populated blocks using {requests_made} requests for {range_size} roll numbers, "
+              f"but {len(unresolved)} lookups failed, so the blocks may be incomplete and '{args.index}' was not "
+              f"updated. Run --discover again to finish them.")
+        return
+
+    index = RollRangeIndex(args.index)
+    index.add(blocks)
+    index.save()
+    print(f"Found {len(blocks)} populated blocks using {requests_made} requests for {range_size} roll numbers; "
+          f"saved to '{args.index}'.")
+
+def load_result_store(args, checkpoint):
+    """
+    Returns the compact result store, rebuilding it from the checkpoint when
+    the checkpoint has changed since it was last saved.
+
+    Args:
+        args (argparse.Namespace): The parsed command line options.
+        checkpoint (CheckpointStore): The store holding the crawled results.
+
+    Returns:
+        ResultStore: The up to date store.
+    """
+    version = checkpoint.found_version()
+    if os.path.exists(args.store):
+        try:
+            store = ResultStore.load(args.store)
+            if store.source_version == version:
+                return store
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Rebuilding '{args.store}': {e}")
+    store = ResultStore.from_records(checkpoint.found_records(), source_version=version)
+    store.save(args.store)
+    print(f"Saved {len(store)} results to '{args.store}'.")
+    return store
+
+def print_stats(store, top):
+    """
+    Prints the aggregate queries of the result store.
+
+    Args:
+        store (ResultStore): The results to summarise.
+        top (int): Number of top students to list.
+    """
+    started = time.perf_counter()
+    sections = [
+        ("Students per result", store.status_counts().to_string()),
+        ("Pass rate per subject", store.pass_rates().to_string(formatters={'pass_rate': '{:.1%}'.format})),
+        (f"Top {top} students by total marks", store.top_students(top).to_string(index=False)),
+        ("Students failing each subject", store.failures_by_subject().to_string()),
+        ("Students by number of failed subjects", store.failed_subject_counts().to_string()),
+        ("Most common failed subject combinations", store.failure_combinations().to_string()),
+    ]
+    elapsed = time.perf_counter() - started
+    for title, text in sections:
+        print(f"\n{title}:\n{text}")
+    print(f"\n{len(store)} results summarised in {elapsed * 1000:.1f} ms.")
+
+def save_pending_to_excel(checkpoint, filename, columns=RECORD_COLUMNS):
+    """
+    Appends the results in the checkpoint that are not in the Excel file yet,
+    including those fetched by an earlier run that crashed before saving.
+
+    Args:
+        checkpoint (CheckpointStore): The store holding the crawled results.
+        filename (str): The Excel file to update.
+        columns (list of str): Column order of the sheet.
+    """
+    pending = checkpoint.unexported_records()
+    all_students_results = [student_result for _, student_result in pending]
+
+    if all_students_results:
+        if append_to_excel(all_students_results, filename, columns):
+            checkpoint.mark_exported(roll_no for roll_no, _ in pending)
+    else:
+        print(f"No new results were retrieved to save to '{filename}'.")
+
+def recheck_results(args, checkpoint, fetcher, make_scheduler, progress):
+    """
+    Diff mode: fetches the selected rolls of the checkpoint again and keeps
+    only what changed. Changed and newly published results replace the stored
+    ones, in the checkpoint and in their existing Excel rows, and every changed
+    value is appended to the change log. Unchanged results are not written at all.
+
+    Args:
+        args (argparse.Namespace): The parsed command line options.
+        checkpoint (CheckpointStore): The store of the earlier crawl.
+        fetcher (ResultFetcher): Lookup function with its settings bound.
+        make_scheduler (callable): Creates the scheduler of a host, as make_scheduler(host).
+        progress (callable): Returns the progress display for a number of roll numbers.
+    """
+    previous = select_recheck_rolls(checkpoint, args.recheck, args.start, args.end)
+    if not previous:
+        print(f"No stored rolls to re-check: none are {RECHECK_SELECTIONS[args.recheck]}.")
+        return
+    diff = ResultDiff(checkpoint, previous)
+
+    def report_failure(roll_no, error):
+        diff.on_failure(roll_no, error)
+        logger.warning("Could not re-check Roll No: %s after %d attempts, keeping the stored result: %s",
+                       roll_no, args.max_attempts, error)
+
+    print(f"Re-checking {len(previous)} roll numbers ({RECHECK_SELECTIONS[args.recheck]}) "
+          f"with {args.concurrency} concurrent requests...")
+    with progress(len(previous)):
+        run_scheduled([str(roll_no) for roll_no in previous], fetcher, make_scheduler(urlparse(args.url).netloc),
+                      on_result=diff.on_result, on_failure=report_failure)
+    print("-" * 30)
+    print(f"Re-check finished: {diff.summary()}.")
+
+    if diff.counts["changed"] or diff.counts["added"]:
+        logged = write_change_log(checkpoint.changes(since=diff.started), args.change_log, RECORD_COLUMNS)
+        print(f"Logged {logged} changed values to '{args.change_log}'.")
+        if args.no_excel:
+            print(f"Results saved to '{args.checkpoint}'. Run with --build-excel to update '{args.output}'.")
         else:
-            print(f"Could not retrieve result for Roll No: {roll_no}")
+            save_pending_to_excel(checkpoint, args.output)
+
+def crawl_profile_file(args, make_scheduler, progress):
+    """
+    Crawls every profile of the --profiles file concurrently, each into its own
+    checkpoint and Excel file, and saves the new results.
+
+    Args:
+        args (argparse.Namespace): The parsed command line options.
+        make_scheduler (callable): Creates the scheduler of a host, as make_scheduler(host).
+        progress (callable): Returns the progress display for a number of roll numbers.
+    """
+    try:
+        profiles = load_profiles(args.profiles)
+    except (OSError, ValueError) as e:
+        print(f"Could not load profiles from '{args.profiles}': {e}")
+        return
+    os.makedirs(args.profile_dir, exist_ok=True)
+
+    stores = {}
+    crawls = []
+    fetchers = []
+    try:
+        for profile in profiles:
+            roll_range = profile.roll_range or ((args.start, args.end) if args.start is not None else None)
+            if roll_range is None:
+                print(f"Skipping profile '{profile.name}': it has no start/end and --start/--end were not given.")
+                continue
+            output = os.path.join(args.profile_dir, f"{profile.name}.xlsx")
+            checkpoint = stores[profile.name] = CheckpointStore(os.path.join(args.profile_dir, f"{profile.name}.sqlite3"))
+            completed = checkpoint.completed_rolls(include_not_found=not args.retry_not_found)
+            completed |= roll_numbers_in_excel(output)
+            roll_numbers = [str(roll) for roll in range(roll_range[0], roll_range[1] + 1) if roll not in completed]
+            print(f"{profile.name}: {len(roll_numbers)} roll numbers to fetch from {profile.host}.")
+
+            def report(roll_no, student_result, checkpoint=checkpoint):
+                checkpoint.record(roll_no, student_result)
+
+            def report_failure(roll_no, error, checkpoint=checkpoint, name=profile.name):
+                checkpoint.record_error(roll_no, str(error))
+                logger.warning("%s: could not retrieve result for Roll No: %s after %d attempts: %s",
+                               name, roll_no, args.max_attempts, error)
+
+            fetcher = ResultFetcher(
+                profile=profile,
+                cache_dir=None if args.no_cache else args.cache_dir,
+                cache_max_bytes=args.cache_size * 1024 * 1024,
+            )
+            fetchers.append(fetcher)
+            crawls.append(ProfileCrawl(profile, roll_numbers, fetcher, on_result=report, on_failure=report_failure))
+
+        with progress(sum(len(crawl.roll_numbers) for crawl in crawls)):
+            crawl_profiles(crawls, make_scheduler)
         print("-" * 30)
 
-    if all_students_results:
-        append_to_excel(all_students_results, "bise_matric_results.xlsx")
+        for crawl in crawls:
+            checkpoint = stores[crawl.profile.name]
+            failed_rolls = checkpoint.error_rolls()
+            if failed_rolls:
+                print(f"{crawl.profile.name}: {len(failed_rolls)} roll numbers could not be fetched "
+                      f"and will be retried on the next run.")
+            if not args.no_excel:
+                save_pending_to_excel(checkpoint, os.path.join(args.profile_dir, f"{crawl.profile.name}.xlsx"),
+                                      crawl.profile.record_columns)
+    finally:
+        for fetcher in fetchers:
+            if fetcher.page_cache is not None:
+                fetcher.page_cache.evict()
+            fetcher.close()
+        for checkpoint in stores.values():
+            checkpoint.close()
+
+def report_metrics(args):
+    """
+    Prints how long each timed phase of the run took and writes the metrics
+    file if one was asked for.
+
+    Args:
+        args (argparse.Namespace): The parsed command line options.
+    """
+    lines = metrics.summary()
+    if lines:
+        print("Timings:")
+        for line in lines:
+            print(line)
+    if args.metrics_out:
+        metrics.write(args.metrics_out, args.metrics_format)
+        print(f"Metrics written to '{args.metrics_out}'.")
+
+def main():
+    """
+    Main function to orchestrate the retrieval and saving of BISE results.
+    """
+    args = parse_arguments()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.build_excel:
+        with CheckpointStore(args.checkpoint) as checkpoint:
+            build_excel_from_checkpoint(checkpoint, args.output)
+        report_metrics(args)
+        return
+    if args.stats:
+        with CheckpointStore(args.checkpoint) as checkpoint:
+            print_stats(load_result_store(args, checkpoint), args.top)
+        return
+    if args.reparse:
+        with CheckpointStore(args.checkpoint) as checkpoint:
+            if reparse_cached_pages(args, checkpoint) and not args.no_excel:
+                build_excel_from_checkpoint(checkpoint, args.output)
+        report_metrics(args)
+        return
+
+    def make_scheduler(host):
+        return AdaptiveScheduler(
+            max_concurrency=args.concurrency,
+            initial_concurrency=max(1, args.concurrency // 2),
+            requests_per_second=args.rate,
+            host=host,
+            retry_policy=RetryPolicy(max_attempts=args.max_attempts),
+        )
+
+    def progress(total):
+        return contextlib.nullcontext() if args.no_progress else ProgressDisplay(total)
+
+    if args.profiles:
+        crawl_profile_file(args, make_scheduler, progress)
+        report_metrics(args)
+        return
+
+    fetcher = ResultFetcher(
+        base_url=args.url,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        exam_session=args.exam_session,
+        cache_max_bytes=args.cache_size * 1024 * 1024,
+    )
+
+    if args.recheck:
+        with CheckpointStore(args.checkpoint) as checkpoint:
+            recheck_results(args, checkpoint, fetcher, make_scheduler, progress)
+        fetcher.close()
+        report_metrics(args)
+        return
+
+    if args.start is not None and args.end is not None:
+        start_roll_no, end_roll_no = args.start, args.end
     else:
-        print("No results were successfully retrieved to save to Excel.")
+        start_roll_no, end_roll_no = get_roll_number_range()
+    if args.use_index:
+        index = RollRangeIndex(args.index)
+        known_ranges = index.clip(start_roll_no, end_roll_no)
+        print(f"Index '{args.index}' has {len(known_ranges)} populated blocks in this range.")
+        roll_numbers_in_range = [str(roll) for low, high in known_ranges for roll in range(low, high + 1)]
+    else:
+        roll_numbers_in_range = [str(roll) for roll in range(start_roll_no, end_roll_no + 1)]
+
+    with CheckpointStore(args.checkpoint) as checkpoint:
+        # Pick up the shards of an interrupted --workers run before deciding what is left
+        leftover = leftover_shards(args.shard_dir)
+        if leftover:
+            merged = merge_shards(leftover, checkpoint)
+            print(f"Recovered {merged} lookups from an interrupted sharded run.")
+
+        # Skip rolls finished by an earlier run or already present in the workbook
+        completed = checkpoint.completed_rolls(include_not_found=not args.retry_not_found)
+        completed |= roll_numbers_in_excel(args.output)
+        roll_numbers_to_search = [roll for roll in roll_numbers_in_range if int(roll) not in completed]
+        skipped = len(roll_numbers_in_range) - len(roll_numbers_to_search)
+        if skipped:
+            print(f"Skipping {skipped} roll numbers already fetched in an earlier run.")
+
+        def report(roll_no, student_result):
+            checkpoint.record(roll_no, student_result)
+
+        def report_failure(roll_no, error):
+            checkpoint.record_error(roll_no, str(error))
+            logger.warning("Could not retrieve result for Roll No: %s after %d attempts: %s",
+                           roll_no, args.max_attempts, error)
+
+        scheduler = make_scheduler(urlparse(args.url).netloc)
+
+        def fetch(roll_numbers, executor=None):
+            run_scheduled(roll_numbers, fetcher, scheduler, on_result=report, on_failure=report_failure,
+                          executor=executor)
+
+        if args.discover:
+            # Every discovery round runs on the same pool, so each worker's session keeps its
+            # page tokens, and on the same scheduler, which keeps its concurrency limit and breaker
+            with progress(None), ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                discover_and_fetch(args, checkpoint, start_roll_no, end_roll_no,
+                                   lambda roll_numbers: fetch(roll_numbers, executor), completed)
+        elif roll_numbers_to_search and args.workers > 1:
+            print(f"Retrieving results for {len(roll_numbers_to_search)} roll numbers with {args.workers} "
+                  f"worker processes, {args.concurrency} concurrent requests each...")
+            shard_paths = run_sharded_crawl(
+                roll_numbers_to_search,
+                args.workers,
+                args.shard_dir,
+                fetcher,
+                concurrency=args.concurrency,
+                requests_per_second=args.rate,
+                max_attempts=args.max_attempts,
+            )
+            merge_shards(shard_paths, checkpoint)
+            print("-" * 30)
+        elif roll_numbers_to_search:
+            print(f"Retrieving results for {len(roll_numbers_to_search)} roll numbers "
+                  f"with {args.concurrency} concurrent requests...")
+            with progress(len(roll_numbers_to_search)):
+                fetch(roll_numbers_to_search)
+            print("-" * 30)
+
+        if fetcher.page_cache is not None:
+            freed = fetcher.page_cache.evict()
+            if freed:
+                print(f"Dropped {freed // 1024} KB of least recently used pages from '{args.cache_dir}'.")
+            fetcher.close()
+
+        failed_rolls = checkpoint.error_rolls()
+        if failed_rolls:
+            print(f"{len(failed_rolls)} roll numbers could not be fetched and will be retried on the next run.")
+
+        if args.no_excel:
+            print(f"Results saved to '{args.checkpoint}'. Run with --build-excel to create '{args.output}'.")
+        else:
+            save_pending_to_excel(checkpoint, args.output)
+
+    report_metrics(args)
 
 if __name__ == "__main__":
     main()
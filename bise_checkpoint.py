@@ -0,0 +1,353 @@
+import json
+import os
+import sqlite3
+import time
+
+from openpyxl import load_workbook
+
+FOUND = "found"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+
+class CheckpointStore:
+    """
+    Persistent record of every roll number a crawl has looked up, kept in a
+    small SQLite database so an interrupted run can pick up where it stopped.
+    It also serves as the row store the Excel file is built from, so results
+    can be saved cheaply during a crawl and formatted only when needed.
+
+    Each roll number is stored with its status (found / not_found / error), the
+    parsed student record when there is one, and whether that record has
+    already been written to the Excel file. Rolls whose lookup failed are kept
+    as errors so the next run tries them again.
+    """
+
+    def __init__(self, path="bise_checkpoint.sqlite3"):
+        """
+        Args:
+            path (str): Location of the SQLite database file. Created if missing.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rolls (
+                roll_no INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                record TEXT,
+                exported INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                roll_no INTEGER NOT NULL,
+                old_record TEXT,
+                new_record TEXT,
+                changed_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.commit()
+
+    def record(self, roll_no, student_record):
+        """
+        Saves the outcome of one lookup. Written immediately so nothing is lost
+        if the process dies afterwards.
+
+        Args:
+            roll_no (str or int): The roll number that was looked up.
+            student_record (dict or None): The parsed record, or None when no result was found.
+        """
+        status = FOUND if student_record else NOT_FOUND
+        record_json = json.dumps(student_record) if student_record else None
+        self.connection.execute(
+            "INSERT OR REPLACE INTO rolls (roll_no, status, record, exported, fetched_at) VALUES (?, ?, ?, 0, ?)",
+            (int(roll_no), status, record_json, time.time()),
+        )
+        self.connection.commit()
+
+    def record_error(self, roll_no, message):
+        """
+        Saves a lookup that failed after all retries, so the roll number is
+        fetched again on the next run rather than counted as done.
+
+        Args:
+            roll_no (str or int): The roll number that failed.
+            message (str): Description of the last error.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO rolls (roll_no, status, record, exported, fetched_at) VALUES (?, ?, ?, 0, ?)",
+            (int(roll_no), ERROR, json.dumps({'error': message}), time.time()),
+        )
+        self.connection.commit()
+
+    def record_many(self, outcomes):
+        """
+        Saves many lookup outcomes in one transaction.
+
+        Args:
+            outcomes (iterable of tuple): (roll_no, status, student_record or None) triples,
+                                          as yielded by outcomes().
+
+        Returns:
+            int: Number of outcomes saved.
+        """
+        now = time.time()
+        rows = (
+            (int(roll_no), status, json.dumps(student_record) if student_record else None, now)
+            for roll_no, status, student_record in outcomes
+        )
+        cursor = self.connection.executemany(
+            "INSERT OR REPLACE INTO rolls (roll_no, status, record, exported, fetched_at) VALUES (?, ?, ?, 0, ?)",
+            rows,
+        )
+        self.connection.commit()
+        return cursor.rowcount
+
+    def outcomes(self):
+        """
+        Streams every lookup outcome in the store, ordered by roll number.
+
+        Yields:
+            tuple: (roll_no, status, student_record or None)
+        """
+        rows = self.connection.execute("SELECT roll_no, status, record FROM rolls ORDER BY roll_no")
+        for roll_no, status, record in rows:
+            yield roll_no, status, json.loads(record) if record else None
+
+    def completed_rolls(self, include_not_found=True):
+        """
+        Returns the roll numbers that do not need to be fetched again.
+
+        Rolls whose lookup failed are never counted as done.
+
+        Args:
+            include_not_found (bool): Whether rolls that returned no result count as done.
+
+        Returns:
+            set of int: The completed roll numbers.
+        """
+        if include_not_found:
+            rows = self.connection.execute("SELECT roll_no FROM rolls WHERE status != ?", (ERROR,))
+        else:
+            rows = self.connection.execute("SELECT roll_no FROM rolls WHERE status = ?", (FOUND,))
+        return {row[0] for row in rows}
+
+    def found_among(self, roll_numbers):
+        """
+        Returns which of the given roll numbers have a found result in the store.
+
+        Args:
+            roll_numbers (list of int): Roll numbers to check.
+
+        Returns:
+            set of int: The ones with a result.
+        """
+        return self.with_status_among(roll_numbers, FOUND)
+
+    def with_status_among(self, roll_numbers, status):
+        """
+        Returns which of the given roll numbers have the given status in the store.
+
+        Args:
+            roll_numbers (list of int): Roll numbers to check.
+            status (str): FOUND, NOT_FOUND or ERROR.
+
+        Returns:
+            set of int: The ones with that status.
+        """
+        matching = set()
+        roll_numbers = [int(roll_no) for roll_no in roll_numbers]
+        # SQLite limits the number of bound parameters, so check in slices
+        for offset in range(0, len(roll_numbers), 500):
+            chunk = roll_numbers[offset:offset + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT roll_no FROM rolls WHERE status = ? AND roll_no IN ({placeholders})", [status] + chunk
+            )
+            matching.update(row[0] for row in rows)
+        return matching
+
+    def error_rolls(self):
+        """
+        Returns:
+            list of int: Roll numbers whose last lookup failed, in ascending order.
+        """
+        rows = self.connection.execute("SELECT roll_no FROM rolls WHERE status = ? ORDER BY roll_no", (ERROR,))
+        return [row[0] for row in rows]
+
+    def unexported_records(self):
+        """
+        Returns the found records that have not been written to Excel yet,
+        ordered by roll number.
+
+        Returns:
+            list of tuple: (roll_no, student_record dict) pairs.
+        """
+        rows = self.connection.execute(
+            "SELECT roll_no, record FROM rolls WHERE status = ? AND exported = 0 ORDER BY roll_no", (FOUND,)
+        )
+        return [(roll_no, json.loads(record)) for roll_no, record in rows]
+
+    def found_records(self):
+        """
+        Streams every found record in the store, ordered by roll number.
+
+        Yields:
+            dict: One student record at a time.
+        """
+        rows = self.connection.execute("SELECT record FROM rolls WHERE status = ? ORDER BY roll_no", (FOUND,))
+        for (record,) in rows:
+            yield json.loads(record)
+
+    def found_items(self):
+        """
+        Streams every found record in the store with its roll number, ordered
+        by roll number.
+
+        Yields:
+            tuple: (roll_no, student_record dict)
+        """
+        rows = self.connection.execute("SELECT roll_no, record FROM rolls WHERE status = ? ORDER BY roll_no", (FOUND,))
+        for roll_no, record in rows:
+            yield roll_no, json.loads(record)
+
+    def found_version(self):
+        """
+        Returns a stamp that changes whenever a found record is added or
+        replaced, so copies derived from the store can tell they are stale.
+
+        Returns:
+            list of float: [number of found records, time of the latest change]
+        """
+        count, latest = self.connection.execute(
+            "SELECT COUNT(*), MAX(fetched_at) FROM rolls WHERE status = ?", (FOUND,)
+        ).fetchone()
+        return [float(count), float(latest or 0.0)]
+
+    def import_records(self, records):
+        """
+        Adds records that exist elsewhere (e.g. rows of an older workbook) to the
+        store as already exported. Rolls the store already knows are left alone.
+
+        Args:
+            records (iterable of dict): Student records with a numeric 'Roll-No'.
+
+        Returns:
+            int: Number of records added.
+        """
+        now = time.time()
+        rows = (
+            (int(record['Roll-No']), FOUND, json.dumps(record), now)
+            for record in records
+            if str(record.get('Roll-No', '')).strip().isdigit()
+        )
+        cursor = self.connection.executemany(
+            "INSERT OR IGNORE INTO rolls (roll_no, status, record, exported, fetched_at) VALUES (?, ?, ?, 1, ?)",
+            rows,
+        )
+        self.connection.commit()
+        return cursor.rowcount
+
+    def record_change(self, roll_no, old_record, new_record):
+        """
+        Replaces a stored result with a changed one and adds the change to the
+        change log, in one transaction. The roll's row is flagged as not
+        exported, so the next Excel update rewrites it.
+
+        Args:
+            roll_no (str or int): The roll number whose result changed.
+            old_record (dict or None): The result stored until now.
+            new_record (dict): The result just fetched.
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO rolls (roll_no, status, record, exported, fetched_at) VALUES (?, ?, ?, 0, ?)",
+                (int(roll_no), FOUND, json.dumps(new_record), now),
+            )
+            self.connection.execute(
+                "INSERT INTO changes (roll_no, old_record, new_record, changed_at) VALUES (?, ?, ?, ?)",
+                (int(roll_no), json.dumps(old_record) if old_record else None, json.dumps(new_record), now),
+            )
+
+    def changes(self, since=0.0):
+        """
+        Streams the change log, oldest first.
+
+        Args:
+            since (float): Only changes recorded after this time (seconds since the epoch).
+
+        Yields:
+            tuple: (roll_no, old_record or None, new_record, changed_at)
+        """
+        rows = self.connection.execute(
+            "SELECT roll_no, old_record, new_record, changed_at FROM changes WHERE changed_at > ? ORDER BY id",
+            (since,),
+        )
+        for roll_no, old_record, new_record, changed_at in rows:
+            yield roll_no, json.loads(old_record) if old_record else None, json.loads(new_record), changed_at
+
+    def mark_exported(self, roll_numbers, fetched_before=None):
+        """
+        Flags records as written to Excel so later runs do not append them again.
+
+        Args:
+            roll_numbers (iterable of int): The roll numbers that were exported.
+            fetched_before (float or None): Only flag rows saved before this time (seconds
+                                            since the epoch), so a result replaced by another
+                                            connection while the export ran stays pending.
+        """
+        if fetched_before is None:
+            self.connection.executemany(
+                "UPDATE rolls SET exported = 1 WHERE roll_no = ?", [(int(roll_no),) for roll_no in roll_numbers]
+            )
+        else:
+            self.connection.executemany(
+                "UPDATE rolls SET exported = 1 WHERE roll_no = ? AND fetched_at <= ?",
+                [(int(roll_no), fetched_before) for roll_no in roll_numbers],
+            )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def roll_numbers_in_excel(filename, sheet_name='BISE Sargodha Matric Results'):
+    """
+    Reads the Roll-No column of an existing results workbook.
+
+    Args:
+        filename (str): Path of the Excel file.
+        sheet_name (str): Sheet holding the results.
+
+    Returns:
+        set of int: Roll numbers already present. Empty if the file or sheet does not exist.
+    """
+    if not os.path.exists(filename):
+        return set()
+
+    book = load_workbook(filename, read_only=True)
+    try:
+        if sheet_name not in book.sheetnames:
+            return set()
+        roll_numbers = set()
+        for (value,) in book[sheet_name].iter_rows(min_row=2, max_col=1, values_only=True):
+            if value is not None and str(value).strip().isdigit():
+                roll_numbers.add(int(str(value).strip()))
+        return roll_numbers
+    finally:
+        book.close()
@@ -0,0 +1,164 @@
+import csv
+import hashlib
+import json
+import os
+import time
+
+from bise_checkpoint import ERROR, FOUND, NOT_FOUND
+from bise_result_store import result_status
+
+# Which stored rolls a re-check pass fetches again
+RECHECK_SELECTIONS = {
+    "failed": "found results whose overall result is FAIL",
+    "found": "every found result",
+    "not-found": "rolls that returned no result",
+    "errors": "rolls whose lookup failed",
+}
+
+CHANGE_LOG_COLUMNS = ['Roll-No', 'Column', 'Old Value', 'New Value', 'Changed At']
+
+
+def normalize_record(record):
+    """
+    Returns a record with every value as a string and empty values dropped, so
+    a record read back from Excel compares equal to the one that was parsed.
+    """
+    return {key: str(value).strip() for key, value in record.items()
+            if value is not None and str(value).strip() != ''}
+
+
+def record_fingerprint(record):
+    """
+    Fingerprints the content of a result. The raw page cannot be compared
+    directly, since it carries a fresh ViewState on every request.
+
+    Args:
+        record (dict or None): A student record, or None for a page without a result.
+
+    Returns:
+        str: Hex digest that changes if and only if a value of the record changes.
+    """
+    if not record:
+        return ""
+    data = json.dumps(normalize_record(record), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def changed_fields(old_record, new_record, columns):
+    """
+    Lists the columns whose value differs between two versions of a result.
+
+    Args:
+        old_record (dict or None): The stored result.
+        new_record (dict): The result just fetched.
+        columns (list of str): Columns to compare, in output order.
+
+    Returns:
+        list of tuple: (column, old value, new value), with '' for missing values.
+    """
+    old_values = normalize_record(old_record or {})
+    new_values = normalize_record(new_record)
+    return [(column, old_values.get(column, ''), new_values.get(column, ''))
+            for column in columns if old_values.get(column, '') != new_values.get(column, '')]
+
+
+def select_recheck_rolls(checkpoint, selection, start=None, end=None):
+    """
+    Picks the rolls of a checkpoint to fetch again, with what is stored for them.
+
+    Args:
+        checkpoint (CheckpointStore): The store of an earlier crawl.
+        selection (str): A key of RECHECK_SELECTIONS.
+        start (int or None): Lowest roll number to include.
+        end (int or None): Highest roll number to include.
+
+    Returns:
+        dict: roll number (int) -> (stored status, stored record or None). In roll order.
+    """
+    wanted_status = {"failed": FOUND, "found": FOUND, "not-found": NOT_FOUND, "errors": ERROR}[selection]
+    selected = {}
+    for roll_no, status, record in checkpoint.outcomes():
+        if status != wanted_status or (start is not None and roll_no < start) or (end is not None and roll_no > end):
+            continue
+        if selection == "failed" and result_status(record.get('overall result', '')) != "FAIL":
+            continue
+        selected[roll_no] = (status, record if status == FOUND else None)
+    return selected
+
+
+class ResultDiff:
+    """
+    Compares re-fetched results against the stored ones and writes back only
+    what changed. Plugs into a crawl as its on_result / on_failure callbacks.
+
+    An unchanged result leaves its checkpoint row untouched, so it is not
+    rewritten in the workbook. A changed or newly published result replaces the
+    stored one and is added to the checkpoint's change log. A page that now has
+    no result for a roll that had one is only reported: a result does not get
+    withdrawn, so the stored one is kept. A roll whose earlier lookup failed is
+    recorded as not found when it has no result, so later runs stop fetching it.
+    """
+
+    def __init__(self, checkpoint, previous):
+        """
+        Args:
+            checkpoint (CheckpointStore): Store holding the results being re-checked.
+            previous (dict): roll number -> (stored status, stored record or None), as
+                             returned by select_recheck_rolls().
+        """
+        self.checkpoint = checkpoint
+        self.statuses = {int(roll_no): status for roll_no, (status, _) in previous.items()}
+        self.records = {int(roll_no): record for roll_no, (_, record) in previous.items()}
+        self.fingerprints = {roll_no: record_fingerprint(record) for roll_no, record in self.records.items()}
+        self.started = time.time()
+        self.counts = {"unchanged": 0, "changed": 0, "added": 0, "missing": 0, "failed": 0}
+
+    def on_result(self, roll_no, student_result):
+        roll_no = int(roll_no)
+        old_fingerprint = self.fingerprints.get(roll_no, "")
+        if not student_result and self.statuses.get(roll_no) == ERROR:
+            self.checkpoint.record(roll_no, None)
+            self.counts["missing"] += 1
+        elif record_fingerprint(student_result) == old_fingerprint:
+            self.counts["unchanged"] += 1
+        elif not student_result:
+            self.counts["missing"] += 1
+        else:
+            self.checkpoint.record_change(roll_no, self.records.get(roll_no), student_result)
+            self.counts["changed" if old_fingerprint else "added"] += 1
+
+    def on_failure(self, roll_no, error):
+        # A failed re-check says nothing about the result, so the stored one stays as it is
+        self.counts["failed"] += 1
+
+    def summary(self):
+        return (f"{self.counts['changed']} changed, {self.counts['added']} newly published, "
+                f"{self.counts['unchanged']} unchanged, {self.counts['missing']} without a result now, "
+                f"{self.counts['failed']} could not be fetched")
+
+
+def write_change_log(changes, filename, columns):
+    """
+    Appends changes to a CSV change log, one line per changed value.
+
+    Args:
+        changes (iterable of tuple): (roll_no, old_record, new_record, changed_at), as
+                                     yielded by CheckpointStore.changes().
+        filename (str): The CSV file. Created with a header row if missing.
+        columns (list of str): Record columns to compare.
+
+    Returns:
+        int: Number of lines written.
+    """
+    new_file = not os.path.exists(filename)
+    lines = 0
+    with open(filename, "a", newline="", encoding="utf-8") as log_file:
+        writer = csv.writer(log_file)
+        if new_file:
+            writer.writerow(CHANGE_LOG_COLUMNS)
+        for roll_no, old_record, new_record, changed_at in changes:
+            changed_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(changed_at))
+            for column, old_value, new_value in changed_fields(old_record, new_record, columns):
+                writer.writerow([roll_no, column, old_value, new_value, changed_at])
+                lines += 1
+    return lines
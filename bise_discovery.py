@@ -0,0 +1,203 @@
+import json
+import os
+
+
+class RollRangeIndex:
+    """
+    Persisted list of roll number ranges known to hold results, kept as a
+    small JSON file so later runs can fetch only inside them.
+
+    Ranges are inclusive (start, end) pairs, stored sorted and merged.
+    """
+
+    def __init__(self, path="bise_roll_index.json"):
+        """
+        Args:
+            path (str): Location of the JSON index file. Loaded if it exists.
+        """
+        self.path = path
+        self.ranges = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as index_file:
+                self.ranges = [tuple(item) for item in json.load(index_file).get("ranges", [])]
+
+    def add(self, ranges):
+        """
+        Adds ranges to the index, merging any that overlap or touch.
+
+        Args:
+            ranges (iterable of tuple): Inclusive (start, end) ranges.
+        """
+        self.ranges = merge_ranges(list(self.ranges) + list(ranges))
+
+    def clip(self, start, end):
+        """
+        Returns the indexed ranges that fall inside start..end, trimmed to it.
+
+        Args:
+            start (int): First roll number.
+            end (int): Last roll number.
+
+        Returns:
+            list of tuple: The overlapping ranges.
+        """
+        return [(max(start, low), min(end, high)) for low, high in self.ranges if low <= end and high >= start]
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump({"ranges": [list(item) for item in self.ranges]}, index_file)
+        os.replace(temp_path, self.path)
+
+
+def merge_ranges(ranges, max_gap=1):
+    """
+    Merges inclusive ranges whose gap is smaller than `max_gap`.
+
+    Args:
+        ranges (list of tuple): Inclusive (start, end) ranges, in any order.
+        max_gap (int): Ranges closer than this are joined. 1 joins only touching ranges.
+
+    Returns:
+        list of tuple: Sorted, non-overlapping ranges.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start - merged[-1][1] <= max_gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def ranges_from_rolls(rolls, gap_tolerance):
+    """
+    Groups found roll numbers into blocks, treating gaps of fewer than
+    `gap_tolerance` missing rolls (absent candidates) as part of the block.
+
+    Args:
+        rolls (iterable of int): Roll numbers that have results.
+        gap_tolerance (int): Consecutive missing rolls that end a block.
+
+    Returns:
+        list of tuple: Inclusive (start, end) blocks.
+    """
+    return merge_ranges([(roll, roll) for roll in rolls], max_gap=gap_tolerance)
+
+
+def discover_valid_ranges(start, end, lookup, step=50, gap_tolerance=10, max_chunk=64, retries=2, on_round=None):
+    """
+    Finds the populated blocks of a roll number range without looking up
+    every roll in it.
+
+    The range is first sampled every `step` rolls. Each sample that has a
+    result seeds two edges that grow outward, one roll chunk per round. An
+    edge gallops (its chunk doubles up to `max_chunk`) while the chunk is full
+    of results, and stops after `gap_tolerance` consecutive misses. Every roll
+    inside a block is therefore looked up, but empty stretches only cost the
+    samples and the misses at each block edge.
+
+    Blocks shorter than `step` may fall between samples and be missed, so
+    `step` should be no larger than the smallest block expected.
+
+    A roll whose lookup failed is unknown, not a miss: it is asked for again
+    in the next round, up to `retries` more times, and its edge waits for it.
+    If it still fails, the edge is abandoned there, so the block found so far
+    may be short. Such rolls are left out of the returned lookups, which lets
+    the caller tell that the blocks may be incomplete.
+
+    Args:
+        start (int): First roll number of the range.
+        end (int): Last roll number of the range.
+        lookup (callable): Takes a list of roll numbers, looks them all up
+                           (concurrently is fine) and returns {roll_no: found},
+                           with None as `found` for a lookup that failed.
+        step (int): Sampling stride.
+        gap_tolerance (int): Consecutive misses that mark the end of a block.
+        max_chunk (int): Largest number of rolls one edge requests per round.
+        retries (int): Extra rounds in which a failed lookup is tried again.
+        on_round (callable or None): Called as on_round(round_number, rolls_requested).
+
+    Returns:
+        tuple: (list of inclusive (start, end) blocks, dict {roll_no: found} of every roll looked up)
+    """
+    known = {}
+    failures = {}
+
+    def look_up(rolls):
+        wanted = sorted({roll for roll in rolls if start <= roll <= end and roll not in known
+                         and failures.get(roll, 0) <= retries})
+        if wanted:
+            for roll, found in lookup(wanted).items():
+                if found is None:
+                    failures[roll] = failures.get(roll, 0) + 1
+                else:
+                    known[roll] = found
+        return len(wanted)
+
+    samples = list(range(start, end + 1, step))
+    if samples[-1] != end:
+        samples.append(end)
+    round_number = 0
+    requested = look_up(samples)
+    for _ in range(retries):
+        if not any(roll in failures and roll not in known for roll in samples):
+            break
+        requested += look_up(samples)
+    if on_round:
+        on_round(round_number, requested)
+
+    # Each edge is [position of the last roll handled, direction, consecutive misses, chunk size]
+    edges = []
+    for roll in samples:
+        if known.get(roll):
+            edges.append([roll, 1, 0, 1])
+            edges.append([roll, -1, 0, 1])
+
+    while edges:
+        round_number += 1
+        wanted = []
+        for position, direction, _, chunk in edges:
+            wanted.extend(position + direction * offset for offset in range(1, chunk + 1))
+        requested = look_up(wanted)
+        if on_round:
+            on_round(round_number, requested)
+
+        still_open = []
+        for edge in edges:
+            position, direction, misses, chunk = edge
+            all_found = True
+            waiting = False
+            base = position
+            for offset in range(1, chunk + 1):
+                roll = base + direction * offset
+                if roll < start or roll > end:
+                    misses = gap_tolerance
+                    break
+                if roll not in known:
+                    # The lookup failed: wait for its retry, or abandon the edge here
+                    waiting = failures.get(roll, 0) <= retries
+                    all_found = False
+                    if not waiting:
+                        misses = gap_tolerance
+                    break
+                if known.get(roll):
+                    misses = 0
+                else:
+                    misses += 1
+                    all_found = False
+                    if misses >= gap_tolerance:
+                        break
+                position = roll
+            if misses >= gap_tolerance:
+                continue
+            # Gallop while the block continues; step carefully near its edge
+            if waiting:
+                chunk = max(1, chunk - abs(position - base))
+            else:
+                chunk = min(max_chunk, chunk * 2) if all_found else max(1, gap_tolerance - misses)
+            still_open.append([position, direction, misses, chunk])
+        edges = still_open
+
+    found_rolls = sorted(roll for roll, found in known.items() if found)
+    return ranges_from_rolls(found_rolls, gap_tolerance), known
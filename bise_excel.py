@@ -0,0 +1,280 @@
+import json
+import os
+import tempfile
+import time
+from copy import copy
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment
+from openpyxl.utils import get_column_letter
+
+from bise_failed_subjects import failed_subject_mask, subject_column_masks
+from bise_metrics import metrics
+from bise_parser import RECORD_COLUMNS
+
+SHEET_NAME = 'BISE Sargodha Matric Results'
+
+# Light red fill for failed subject cells
+RED_FILL = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+HEADER_FONT = Font(bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+
+# Freezes row 1 and columns A, B
+FREEZE_PANES = 'C2'
+
+
+class StreamingExcelWriter:
+    """
+    Writes student records to a formatted Excel file in bounded memory.
+
+    Rows are spooled to a temporary file as they arrive while the column widths
+    and failed-subject fills are worked out row by row. On close the workbook is
+    streamed out with openpyxl's write-only mode, which needs the column widths
+    before the first row is written, and then moved over `filename`.
+
+    Only the results sheet is replaced. Any other sheets of an existing
+    `filename`, such as notes or an older layout, are streamed across row by
+    row, keeping their order, values and cell formatting. Settings of those
+    sheets that the read-only reader cannot see, such as column widths, merged
+    cells and frozen panes, are not kept.
+
+    Usage:
+        with StreamingExcelWriter("results.xlsx") as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(self, filename, columns=RECORD_COLUMNS, sheet_name=SHEET_NAME):
+        """
+        Args:
+            filename (str): Excel file to create. If it exists, only its results sheet is replaced.
+            columns (list of str): Column order of the sheet.
+            sheet_name (str): Name of the results sheet.
+        """
+        self.filename = filename
+        self.columns = list(columns)
+        self.sheet_name = sheet_name
+        self.row_count = 0
+        self.widths = [len(column) for column in self.columns]
+        self._subject_columns = subject_column_masks(self.columns)
+        self._spool = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+
+    def write(self, record):
+        """
+        Adds one student record.
+
+        Args:
+            record (dict): The student record, keyed by column name.
+        """
+        values = []
+        for index, column in enumerate(self.columns):
+            value = record.get(column, '')
+            value = '' if value is None else value
+            values.append(value)
+            length = len(str(value))
+            if length > self.widths[index]:
+                self.widths[index] = length
+
+        failed_mask = failed_subject_mask(record.get('overall result', '') or '')
+        self._spool.write(json.dumps([values, int(failed_mask)]))
+        self._spool.write('\n')
+        self.row_count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        """
+        Writes the workbook and releases the spool file.
+
+        Returns:
+            int: Number of student rows written.
+        """
+        if self._spool is None:
+            return self.row_count
+
+        book, sheet = self._open_book()
+
+        # Column widths and frozen panes must be set before any row is written
+        for index, width in enumerate(self.widths, start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = width + 2
+        sheet.freeze_panes = FREEZE_PANES
+
+        header = []
+        for column in self.columns:
+            cell = WriteOnlyCell(sheet, value=column)
+            cell.font = HEADER_FONT
+            cell.alignment = HEADER_ALIGNMENT
+            header.append(cell)
+        sheet.append(header)
+
+        self._spool.seek(0)
+        for line in self._spool:
+            values, failed_mask = json.loads(line)
+            row = [value if value != '' else None for value in values]
+            if failed_mask:
+                for index, bit in self._subject_columns:
+                    if failed_mask & bit:
+                        cell = WriteOnlyCell(sheet, value=row[index])
+                        cell.fill = RED_FILL
+                        row[index] = cell
+            sheet.append(row)
+        self._spool.close()
+        self._spool = None
+
+        # Save next to the target and swap it in, so a failed save leaves the old file intact
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        file_descriptor, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=directory)
+        os.close(file_descriptor)
+        try:
+            book.save(temp_path)
+            os.replace(temp_path, self.filename)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self.row_count
+
+    def _open_book(self):
+        """
+        Returns:
+            tuple: (write-only workbook to save, empty results sheet in it)
+        """
+        book = Workbook(write_only=True)
+        if not os.path.exists(self.filename):
+            return book, book.create_sheet(self.sheet_name)
+
+        sheet = None
+        source = load_workbook(self.filename, read_only=True)
+        try:
+            for name in source.sheetnames:
+                if name == self.sheet_name:
+                    sheet = book.create_sheet(name)
+                else:
+                    self._copy_sheet(source[name], book.create_sheet(name))
+        finally:
+            source.close()
+        return book, sheet if sheet is not None else book.create_sheet(self.sheet_name)
+
+    @staticmethod
+    def _copy_sheet(source, target):
+        """
+        Streams the cells of a read-only sheet into a write-only one, with their formatting.
+        """
+        for row in source.iter_rows():
+            values = []
+            for cell in row:
+                if not getattr(cell, 'has_style', False):
+                    values.append(cell.value)
+                    continue
+                copied = WriteOnlyCell(target, value=cell.value)
+                copied.font = copy(cell.font)
+                copied.fill = copy(cell.fill)
+                copied.border = copy(cell.border)
+                copied.alignment = copy(cell.alignment)
+                copied.protection = copy(cell.protection)
+                copied.number_format = cell.number_format
+                values.append(copied)
+            target.append(values)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+
+def read_excel_records(filename, sheet_name=SHEET_NAME, columns=RECORD_COLUMNS):
+    """
+    Streams the student records out of an existing results workbook without
+    loading the whole sheet into memory.
+
+    Args:
+        filename (str): Path of the Excel file.
+        sheet_name (str): Sheet holding the results.
+        columns (list of str): Columns to read, matched against the header row.
+
+    Yields:
+        dict: One student record per data row, with '' for empty cells.
+    """
+    book = load_workbook(filename, read_only=True)
+    try:
+        if sheet_name not in book.sheetnames:
+            return
+        rows = book[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = {name: index for index, name in enumerate(header) if name in columns}
+        for values in rows:
+            if not any(value is not None for value in values):
+                continue
+            record = {}
+            for column in columns:
+                index = positions.get(column)
+                value = values[index] if index is not None and index < len(values) else None
+                record[column] = '' if value is None else str(value)
+            yield record
+    finally:
+        book.close()
+
+
+def export_to_excel(records, filename, sheet_name=SHEET_NAME, columns=RECORD_COLUMNS):
+    """
+    Writes student records to a formatted Excel file, replacing the results
+    sheet of any workbook already at `filename` and keeping its other sheets.
+
+    Args:
+        records (iterable of dict): The student records. May be a generator.
+        filename (str): The Excel file to write.
+        sheet_name (str): Name of the results sheet.
+        columns (list of str): Column order of the sheet.
+
+    Returns:
+        int: Number of student rows written.
+    """
+    with metrics.span("export"), StreamingExcelWriter(filename, columns, sheet_name) as writer:
+        writer.write_many(records)
+    metrics.increment("exported_rows", writer.row_count)
+    return writer.row_count
+
+
+def export_checkpoint_to_excel(checkpoint, filename, sheet_name=SHEET_NAME, columns=RECORD_COLUMNS):
+    """
+    Rebuilds the Excel file from every found record in a checkpoint store.
+    Rows of an existing workbook that the store does not know yet are
+    imported into it first, so nothing already in the file is dropped.
+
+    Only the rows actually written are flagged as exported. A crawl may keep
+    saving results on another connection meanwhile; those stay pending for
+    the next Excel update.
+
+    Args:
+        checkpoint (CheckpointStore): The store holding the crawled results.
+        filename (str): The Excel file to write.
+        sheet_name (str): Name of the results sheet.
+        columns (list of str): Column order of the sheet.
+
+    Returns:
+        tuple: (rows imported from the old workbook, rows written)
+    """
+    imported = 0
+    if os.path.exists(filename):
+        imported = checkpoint.import_records(read_excel_records(filename, sheet_name, columns))
+    started = time.time()
+    written = []
+
+    def records():
+        for roll_no, record in checkpoint.found_items():
+            written.append(roll_no)
+            yield record
+
+    row_count = export_to_excel(records(), filename, sheet_name, columns)
+    checkpoint.mark_exported(written, fetched_before=started)
+    return imported, row_count
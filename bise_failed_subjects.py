@@ -0,0 +1,111 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Mapping of common failed subject abbreviations/keywords to Excel column names
+FAILED_SUBJECT_KEYWORDS_MAP = {
+    "BIO": "Biology",
+    "PHY": "Physics",
+    "CHM": "Chemistry",
+    "EGL": "English",
+    "URU": "Urdu",
+    "MAT": "Mathematics",
+    "THQ": "THQ",
+    "PKS": "Pakistan Studies",
+    "ISM": "Islamiyat",
+    "CSC": "Computer Science",
+    "CS": "Computer Science"
+}
+
+# One bit per subject column, in the order the columns first appear in the map above
+SUBJECT_COLUMNS = list(dict.fromkeys(FAILED_SUBJECT_KEYWORDS_MAP.values()))
+SUBJECT_BITS = {column: 1 << index for index, column in enumerate(SUBJECT_COLUMNS)}
+KEYWORD_BITS = {keyword: SUBJECT_BITS[column] for keyword, column in FAILED_SUBJECT_KEYWORDS_MAP.items()}
+
+# A failed subject is a whole word made of a keyword plus an optional part
+# suffix: I, II (or both stripped in turn, so up to III). Words are separated by
+# whitespace, '/' or '-'; '(PR)' practical markers are dropped beforehand.
+# Longest keywords come first so CSC wins over CS.
+FAILED_SUBJECT_PATTERN = re.compile(
+    r'(?<![^\s/-])('
+    + '|'.join(sorted(map(re.escape, FAILED_SUBJECT_KEYWORDS_MAP), key=len, reverse=True))
+    + r')I{0,3}(?![^\s/-])'
+)
+
+
+@lru_cache(maxsize=65536)
+def failed_subject_mask(overall_result):
+    """
+    Classifies an 'overall result' string such as "FAIL BIOII PHY(PR)".
+
+    Args:
+        overall_result (str): The overall result text.
+
+    Returns:
+        int: Bitmask of failed subjects; bit values are given by SUBJECT_BITS.
+    """
+    mask = 0
+    text = str(overall_result).upper().replace('(PR)', '')
+    for keyword in FAILED_SUBJECT_PATTERN.findall(text):
+        mask |= KEYWORD_BITS[keyword]
+    return mask
+
+
+def subjects_from_mask(mask):
+    """
+    Args:
+        mask (int): Bitmask returned by failed_subject_mask.
+
+    Returns:
+        set of str: Excel column names of the failed subjects.
+    """
+    return {column for column, bit in SUBJECT_BITS.items() if mask & bit}
+
+
+def failed_subjects(overall_result):
+    """
+    Identifies the failed subjects listed in an 'overall result' string.
+
+    Args:
+        overall_result (str): The overall result text.
+
+    Returns:
+        set of str: Excel column names of the failed subjects.
+    """
+    return subjects_from_mask(failed_subject_mask(overall_result))
+
+
+def failed_subject_masks(overall_results):
+    """
+    Classifies a whole column of 'overall result' strings at once.
+
+    Result strings repeat heavily across a board, so each distinct string is
+    classified once and the masks are broadcast back with a single array take.
+
+    Args:
+        overall_results (pandas.Series or iterable of str): The overall results.
+
+    Returns:
+        pandas.Series: uint16 failed-subject bitmask per row, aligned with the input index.
+    """
+    if not isinstance(overall_results, pd.Series):
+        overall_results = pd.Series(list(overall_results), dtype=object)
+    codes, uniques = pd.factorize(overall_results.fillna('').astype(str), sort=False)
+    unique_masks = np.fromiter((failed_subject_mask(value) for value in uniques), dtype=np.uint16, count=len(uniques))
+    masks = unique_masks.take(codes) if len(codes) else np.zeros(0, dtype=np.uint16)
+    return pd.Series(masks, index=overall_results.index, dtype=np.uint16)
+
+
+def subject_column_masks(columns):
+    """
+    Lists, for a sheet's column order, which columns carry a failed-subject bit.
+
+    Args:
+        columns (list of str): The sheet columns in order.
+
+    Returns:
+        list of tuple: (0-based column index, bit) pairs for the subject columns.
+    """
+    return [(index, SUBJECT_BITS[column]) for index, column in enumerate(columns) if column in SUBJECT_BITS]
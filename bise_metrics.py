@@ -0,0 +1,300 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Counters whose sum is the number of roll numbers finished
+COMPLETED_COUNTERS = ("found", "not_found", "failed")
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of observed values, in the style of Prometheus:
+    each bucket counts the values less than or equal to its upper bound, and
+    one overflow bucket catches everything larger.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            buckets (tuple of float): Ascending bucket upper bounds.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """
+        Estimates a quantile as the upper bound of the bucket it falls in.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            float: The estimate, or infinity if it falls in the overflow bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    def merge(self, data):
+        for index, count in enumerate(data["counts"]):
+            self.counts[index] += count
+        self.sum += data["sum"]
+        self.count += data["count"]
+
+
+class MetricsRegistry:
+    """
+    Counters and latency histograms for one crawl, safe to update from the
+    fetch engine's worker threads.
+
+    Usage:
+        with metrics.span("post"):
+            response = session.post(...)
+        metrics.increment("found")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.monotonic()
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def counter(self, name):
+        return self.counters.get(name, 0)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def histogram(self, name):
+        return self.histograms.get(name) or Histogram()
+
+    @contextmanager
+    def span(self, name):
+        """
+        Times the enclosed block into the `name` histogram, whether or not it raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Plain data copy of every counter and histogram, suitable for
+                  JSON or for sending to another process.
+        """
+        with self._lock:
+            return {
+                "elapsed_seconds": self.elapsed(),
+                "counters": dict(self.counters),
+                "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+
+    def merge(self, snapshot):
+        """
+        Adds the counters and histograms of a snapshot, e.g. from a worker process.
+
+        Args:
+            snapshot (dict): A dict returned by snapshot().
+        """
+        with self._lock:
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, data in snapshot["histograms"].items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram(data["buckets"])
+                histogram.merge(data)
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="bise"):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix for every metric name.
+
+        Returns:
+            str: The metrics text.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, data in sorted(snapshot["histograms"].items()):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(data["buckets"], data["counts"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {data["count"]}')
+            lines.append(f"{metric}_sum {data['sum']:.6f}")
+            lines.append(f"{metric}_count {data['count']}")
+        lines.append(f"# TYPE {prefix}_elapsed_seconds gauge")
+        lines.append(f"{prefix}_elapsed_seconds {snapshot['elapsed_seconds']:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, format="json"):
+        """
+        Dumps the metrics to a file.
+
+        Args:
+            path (str): File to write.
+            format (str): "json" or "prometheus".
+        """
+        text = self.to_prometheus() if format == "prometheus" else self.to_json()
+        with open(path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(text)
+
+    def summary(self):
+        """
+        Returns:
+            list of str: One line per timed phase with its count, mean and 95th percentile.
+        """
+        lines = []
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            lines.append(f"{name:>8}: {histogram.count} x, mean {histogram.mean() * 1000:.1f} ms, "
+                         f"p95 <= {histogram.quantile(0.95) * 1000:.0f} ms")
+        return lines
+
+
+# Registry used by the scraper modules; worker processes send theirs back with snapshot()
+metrics = MetricsRegistry()
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ProgressDisplay:
+    """
+    Shows a live progress line for a crawl, refreshed from a background thread
+    so the fetch workers never wait on the terminal: roll numbers finished,
+    found/not-found/failed counts, requests per second and the estimated time
+    left. On a terminal the line is redrawn in place; otherwise a new line is
+    written every `interval` seconds.
+    """
+
+    def __init__(self, total=None, registry=metrics, interval=1.0, stream=None):
+        """
+        Args:
+            total (int or None): Roll numbers to be fetched. None when not known in advance.
+            registry (MetricsRegistry): Where the counters are read from.
+            interval (float): Seconds between refreshes on a terminal; ten times this otherwise.
+            stream (file or None): Output stream. Defaults to sys.stderr.
+        """
+        self.total = total
+        self.registry = registry
+        self.stream = stream or sys.stderr
+        self.in_place = self.stream.isatty()
+        self.interval = interval if self.in_place else interval * 10
+        self._initial_done = self._done()
+        self._initial_posts = registry.histogram("post").count
+        self._started = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _done(self):
+        return sum(self.registry.counter(name) for name in COMPLETED_COUNTERS)
+
+    def line(self):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        done = self._done() - self._initial_done
+        requests_per_second = (self.registry.histogram("post").count - self._initial_posts) / elapsed
+        parts = [f"[{elapsed:6.0f}s] {done}" + (f"/{self.total}" if self.total else "") + " rolls"]
+        if self.total:
+            parts[0] += f" ({done / self.total:.0%})"
+        parts.append(f"found {self.registry.counter('found')}, not found {self.registry.counter('not_found')}, "
+                     f"failed {self.registry.counter('failed')}")
+        parts.append(f"{requests_per_second:.1f} req/s")
+        if self.total:
+            eta = (self.total - done) * elapsed / done if done else None
+            parts.append(f"ETA {format_eta(eta)}")
+        return " | ".join(parts)
+
+    def _draw(self):
+        if self.in_place:
+            self.stream.write("\r\033[K" + self.line())
+        else:
+            self.stream.write(self.line() + "\n")
+        self.stream.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._draw()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._draw()
+        if self.in_place:
+            self.stream.write("\n")
+            self.stream.flush()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
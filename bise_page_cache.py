@@ -0,0 +1,213 @@
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Hidden ASP.NET state fields. The server issues fresh values on every response,
+# and they are not needed to parse the page again
+PAGE_TOKEN_PATTERN = re.compile(
+    r'<input\b[^>]*\bname="__(?:VIEWSTATE|VIEWSTATEGENERATOR|VIEWSTATEENCRYPTED|EVENTVALIDATION|PREVIOUSPAGE)"[^>]*>',
+    re.IGNORECASE,
+)
+
+
+def strip_page_tokens(html):
+    """
+    Removes the hidden ViewState / EventValidation inputs from a page, so two
+    responses showing the same result have the same content.
+    """
+    return PAGE_TOKEN_PATTERN.sub("", html)
+
+
+class PageCache:
+    """
+    On-disk cache of raw result pages, so parsing changes can be replayed
+    without asking the board server again.
+
+    Pages are stored without their ViewState and EventValidation tokens,
+    which are several kilobytes and differ on every response, then compressed
+    with zlib and stored content-addressed under
+    objects/<first two hex digits>/<sha256>.z, so pages showing the same
+    content (every "no record found" page, for instance) are kept once. A small SQLite index maps
+    (exam session, roll number) to the page digest and remembers when each
+    entry was last used. When the stored pages grow past `max_bytes` the least
+    recently used entries are evicted.
+
+    The cache may be shared by the fetch engine's worker threads and by
+    worker processes.
+    """
+
+    def __init__(self, directory="bise_page_cache", max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory (str): Directory holding the index and the page objects.
+            max_bytes (int): Size limit for the compressed pages, in bytes.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=30,
+                                          check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                exam_session TEXT NOT NULL,
+                roll_no INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                used_at REAL NOT NULL,
+                PRIMARY KEY (exam_session, roll_no)
+            );
+            CREATE TABLE IF NOT EXISTS objects (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_by_use ON pages (used_at);
+            CREATE INDEX IF NOT EXISTS pages_by_digest ON pages (digest);
+            """
+        )
+        self.connection.commit()
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest + ".z")
+
+    def put(self, exam_session, roll_no, html):
+        """
+        Stores the page fetched for a roll number, replacing any earlier copy.
+
+        Args:
+            exam_session (str): Name of the exam session the page belongs to.
+            roll_no (str or int): The roll number.
+            html (str): The raw page HTML.
+        """
+        data = strip_page_tokens(html).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zlib.compress(data, 6)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(file_descriptor, "wb") as object_file:
+                object_file.write(compressed)
+            os.replace(temp_path, path)
+        else:
+            compressed = None
+
+        now = time.time()
+        with self._lock:
+            if compressed is not None:
+                self.connection.execute("INSERT OR IGNORE INTO objects (digest, size) VALUES (?, ?)",
+                                        (digest, len(compressed)))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (exam_session, roll_no, digest, fetched_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (exam_session, int(roll_no), digest, now, now),
+            )
+            self.connection.commit()
+
+    def _read_object(self, digest):
+        try:
+            with open(self._object_path(digest), "rb") as object_file:
+                return zlib.decompress(object_file.read()).decode("utf-8")
+        except (OSError, zlib.error):
+            return None
+
+    def get(self, exam_session, roll_no):
+        """
+        Returns the cached page for a roll number.
+
+        Args:
+            exam_session (str): Name of the exam session.
+            roll_no (str or int): The roll number.
+
+        Returns:
+            str or None: The page HTML, or None if it is not cached.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT digest FROM pages WHERE exam_session = ? AND roll_no = ?", (exam_session, int(roll_no))
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE pages SET used_at = ? WHERE exam_session = ? AND roll_no = ?",
+                (time.time(), exam_session, int(roll_no)),
+            )
+            self.connection.commit()
+        return self._read_object(row[0])
+
+    def pages(self, exam_session):
+        """
+        Streams every cached page of an exam session in roll number order.
+
+        Args:
+            exam_session (str): Name of the exam session.
+
+        Yields:
+            tuple: (roll_no, html)
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT roll_no, digest FROM pages WHERE exam_session = ? ORDER BY roll_no", (exam_session,)
+            ).fetchall()
+        for roll_no, digest in rows:
+            html = self._read_object(digest)
+            if html is not None:
+                yield roll_no, html
+
+    def total_bytes(self):
+        with self._lock:
+            return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def evict(self):
+        """
+        Removes least recently used entries until the stored pages fit in
+        `max_bytes`, deleting page objects that no entry refers to any more.
+
+        Returns:
+            int: Number of bytes freed.
+        """
+        freed = 0
+        with self._lock:
+            total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            entries = self.connection.execute(
+                "SELECT exam_session, roll_no, digest FROM pages ORDER BY used_at"
+            ).fetchall()
+            for exam_session, roll_no, digest in entries:
+                if total - freed <= self.max_bytes:
+                    break
+                self.connection.execute("DELETE FROM pages WHERE exam_session = ? AND roll_no = ?",
+                                        (exam_session, roll_no))
+                still_used = self.connection.execute(
+                    "SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)
+                ).fetchone()
+                if still_used:
+                    continue
+                size = self.connection.execute("SELECT size FROM objects WHERE digest = ?", (digest,)).fetchone()
+                self.connection.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+                try:
+                    os.remove(self._object_path(digest))
+                except OSError:
+                    pass
+                freed += size[0] if size else 0
+            self.connection.commit()
+        return freed
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,230 @@
+from html.parser import HTMLParser
+
+# Columns of a student record, in the order they appear in the Excel file
+# (Computer Science and Biology first, then other Science subjects, then Arts subjects)
+RECORD_COLUMNS = [
+    'Roll-No', 'Candidate Name', 'Father Name', 'Computer Science', 'Biology',
+    'Mathematics', 'Physics', 'Chemistry', 'Islamiyat', 'Pakistan Studies', 'Urdu',
+    'English', 'THQ', 'overall result'
+]
+
+# Mapping from subject names in the result table to Excel column names
+SUBJECT_COLUMN_MAP = {
+    "ISLAMIYAT (COMPULSORY)": "Islamiyat",
+    "PAKISTAN STUDIES (COMPULSORY)": "Pakistan Studies",
+    "URDU": "Urdu",
+    "ENGLISH": "English",
+    "MATHEMATICS": "Mathematics",
+    "PHYSICS": "Physics",
+    "CHEMISTRY": "Chemistry",
+    "COMPUTER SCIENCE": "Computer Science",
+    "TRANSLATION OF THE HOLY QURAN": "THQ",
+    "BIOLOGY": "Biology"
+}
+
+# Span ids on the result page and the record fields they fill
+LABEL_FIELDS = {
+    'LblRollNo': 'Roll-No',
+    'LblName': 'Candidate Name',
+    'LblFatherName': 'Father Name',
+    'lblGazres': 'overall result',
+}
+
+RESULT_TABLE_ID = 'TblResult'
+
+# Rows at the top of the result table holding headers and student info
+RESULT_TABLE_HEADER_ROWS = 5
+
+# Cell of a subject row holding the marks obtained
+MARKS_COLUMN = 2
+
+TOKEN_FIELDS = ('__VIEWSTATE', '__EVENTVALIDATION')
+
+
+class ResultPageScanner(HTMLParser):
+    """
+    Walks a result page once and keeps only what the scraper needs: the text of
+    the student info spans, the hidden ASP.NET token inputs and the cell texts
+    of the TblResult rows. No document tree is built.
+
+    Text is collected the way BeautifulSoup's get_text(strip=True) does it:
+    every text piece is stripped and the pieces are joined without a separator.
+    """
+
+    def __init__(self, label_ids=LABEL_FIELDS, table_id=RESULT_TABLE_ID, token_fields=TOKEN_FIELDS):
+        super().__init__(convert_charrefs=True)
+        self.label_ids = label_ids
+        self.table_id = table_id
+        self.token_fields = token_fields
+        self.labels = {}
+        self.tokens = {}
+        self.rows = []
+        self.table_found = False
+        self._label_id = None
+        self._label_depth = 0
+        self._label_text = []
+        self._table_depth = 0
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'input':
+            attributes = dict(attrs)
+            name = attributes.get('name')
+            if name in self.token_fields and name not in self.tokens:
+                self.tokens[name] = attributes.get('value') or ''
+            return
+
+        if tag == 'span':
+            if self._label_id is not None:
+                self._label_depth += 1
+            else:
+                span_id = dict(attrs).get('id')
+                if span_id in self.label_ids and span_id not in self.labels:
+                    self._label_id = span_id
+                    self._label_depth = 1
+                    self._label_text = []
+
+        if tag == 'table':
+            if self._table_depth:
+                self._table_depth += 1
+            elif dict(attrs).get('id') == self.table_id and not self.table_found:
+                self.table_found = True
+                self._table_depth = 1
+            return
+
+        if not self._table_depth:
+            return
+        if tag == 'tr':
+            self._close_row()
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._close_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag == 'span' and self._label_id is not None:
+            self._label_depth -= 1
+            if self._label_depth == 0:
+                self.labels[self._label_id] = ''.join(self._label_text)
+                self._label_id = None
+            return
+
+        if not self._table_depth:
+            return
+        if tag in ('td', 'th'):
+            self._close_cell()
+        elif tag == 'tr':
+            self._close_row()
+        elif tag == 'table':
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._close_row()
+
+    def handle_data(self, data):
+        text = data.strip()
+        if not text:
+            return
+        if self._label_id is not None:
+            self._label_text.append(text)
+        if self._cell is not None:
+            self._cell.append(text)
+
+    def close(self):
+        super().close()
+        if self._label_id is not None:
+            self.labels[self._label_id] = ''.join(self._label_text)
+            self._label_id = None
+        self._close_row()
+
+    def _close_cell(self):
+        if self._cell is not None:
+            self._row.append(''.join(self._cell))
+            self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+
+def scan_page(html, label_ids=LABEL_FIELDS, table_id=RESULT_TABLE_ID):
+    """
+    Runs the single-pass scanner over a page.
+
+    Args:
+        html (str): The page HTML.
+        label_ids (dict or set): Ids of the spans whose text is collected.
+        table_id (str): Id of the result table.
+
+    Returns:
+        ResultPageScanner: The scanner holding labels, tokens and table rows.
+    """
+    scanner = ResultPageScanner(label_ids=label_ids, table_id=table_id)
+    scanner.feed(html)
+    scanner.close()
+    return scanner
+
+
+def empty_record(columns=RECORD_COLUMNS):
+    """
+    Returns a student record with every column set to ''.
+    """
+    return dict.fromkeys(columns, '')
+
+
+def parse_result_page(html, subject_column_map=SUBJECT_COLUMN_MAP, label_fields=LABEL_FIELDS,
+                      table_id=RESULT_TABLE_ID, header_rows=RESULT_TABLE_HEADER_ROWS, marks_column=MARKS_COLUMN,
+                      columns=RECORD_COLUMNS):
+    """
+    Extracts a student's result from the page returned by the search POST.
+    The defaults describe the BISE Sargodha page; other boards pass their own
+    layout (see bise_profiles.BoardProfile).
+
+    Args:
+        html (str): The result page HTML.
+        subject_column_map (dict): Mapping from subject names in the result table
+                                   to record column names.
+        label_fields (dict): Mapping from span ids to record fields. One of the
+                             fields must be 'Roll-No'.
+        table_id (str): Id of the result table.
+        header_rows (int): Rows at the top of the table that are not subjects.
+        marks_column (int): Cell of a subject row holding the marks obtained.
+        columns (list of str): Columns of the returned record.
+
+    Returns:
+        dict or None: The student record in the Excel column format, or None if
+                      the page holds no result (e.g. an invalid roll number).
+    """
+    scanner = scan_page(html, label_ids=label_fields, table_id=table_id)
+
+    student_record = empty_record(columns)
+    for label_id, field in label_fields.items():
+        student_record[field] = scanner.labels.get(label_id, '')
+
+    # Check if result data is actually present (e.g., if a valid roll number was entered)
+    if not student_record['Roll-No']:
+        return None
+
+    # Skip the first rows which are headers/student info
+    for cols in scanner.rows[header_rows:]:
+        if len(cols) > marks_column: # Ensure at least subject name and marks obtained
+            excel_column_name = subject_column_map.get(cols[0])
+            if excel_column_name:
+                student_record[excel_column_name] = cols[marks_column]
+    return student_record
+
+
+def parse_tokens(html):
+    """
+    Pulls __VIEWSTATE and __EVENTVALIDATION out of a page.
+
+    Args:
+        html (str): The page HTML.
+
+    Returns:
+        tuple: (viewstate, eventvalidation). Either is '' when missing.
+    """
+    scanner = scan_page(html)
+    return scanner.tokens.get('__VIEWSTATE', ''), scanner.tokens.get('__EVENTVALIDATION', '')
@@ -0,0 +1,215 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from bise_parser import (
+    LABEL_FIELDS,
+    MARKS_COLUMN,
+    RECORD_COLUMNS,
+    RESULT_TABLE_HEADER_ROWS,
+    RESULT_TABLE_ID,
+    SUBJECT_COLUMN_MAP,
+    parse_result_page,
+)
+from bise_session import BASE_URL, ROLL_NUMBER_FIELD, SEARCH_FORM_FIELDS
+
+# Keys a profile entry in a profiles file may have
+PROFILE_KEYS = {
+    "name", "url", "roll_field", "form_fields", "label_fields", "result_table_id", "header_rows", "marks_column",
+    "subject_column_map", "record_columns", "start", "end",
+}
+
+
+class BoardProfile:
+    """
+    Declarative description of one board's (or one exam session's) result
+    page: where it is, how its search form is filled in and where the result
+    sits in the returned page. Every setting defaults to the BISE Sargodha
+    matric page, so a profile only lists what differs.
+    """
+
+    def __init__(self, name, base_url=BASE_URL, roll_field=ROLL_NUMBER_FIELD, form_fields=SEARCH_FORM_FIELDS,
+                 label_fields=LABEL_FIELDS, result_table_id=RESULT_TABLE_ID, header_rows=RESULT_TABLE_HEADER_ROWS,
+                 marks_column=MARKS_COLUMN, subject_column_map=SUBJECT_COLUMN_MAP, record_columns=None,
+                 roll_range=None):
+        """
+        Args:
+            name (str): Unique name, used for the cache key and the output file names.
+            base_url (str): URL of the result page.
+            roll_field (str): Search form field taking the roll number.
+            form_fields (dict): Other search form fields posted with every search.
+            label_fields (dict): Span ids on the result page mapped to record fields;
+                                 must include one for 'Roll-No'.
+            result_table_id (str): Id of the table listing the subjects.
+            header_rows (int): Rows at the top of that table that are not subjects.
+            marks_column (int): Cell of a subject row holding the marks obtained.
+            subject_column_map (dict): Subject names in the table mapped to record columns.
+            record_columns (list of str or None): Column order of the records and the Excel
+                                                  sheet. Defaults to the label fields, then
+                                                  the subjects, then 'overall result'.
+            roll_range (tuple or None): Inclusive (start, end) roll numbers to crawl.
+        """
+        if 'Roll-No' not in label_fields.values():
+            raise ValueError(f"Profile '{name}' has no label field for 'Roll-No'.")
+        self.name = name
+        self.base_url = base_url
+        self.roll_field = roll_field
+        self.form_fields = dict(form_fields)
+        self.label_fields = dict(label_fields)
+        self.result_table_id = result_table_id
+        self.header_rows = header_rows
+        self.marks_column = marks_column
+        self.subject_column_map = dict(subject_column_map)
+        if record_columns is None:
+            if self.subject_column_map == SUBJECT_COLUMN_MAP and self.label_fields == LABEL_FIELDS:
+                record_columns = RECORD_COLUMNS
+            else:
+                labels = [field for field in self.label_fields.values() if field != 'overall result']
+                subjects = [column for column in dict.fromkeys(self.subject_column_map.values()) if column not in labels]
+                tail = ['overall result'] if 'overall result' in self.label_fields.values() else []
+                record_columns = labels + subjects + tail
+        self.record_columns = list(record_columns)
+        self.roll_range = tuple(roll_range) if roll_range else None
+
+    @property
+    def host(self):
+        return urlparse(self.base_url).netloc
+
+    def parse(self, html):
+        """
+        Extracts a student's result from a page of this profile.
+
+        Args:
+            html (str): The result page HTML.
+
+        Returns:
+            dict or None: The student record, or None if the page holds no result.
+        """
+        return parse_result_page(
+            html,
+            subject_column_map=self.subject_column_map,
+            label_fields=self.label_fields,
+            table_id=self.result_table_id,
+            header_rows=self.header_rows,
+            marks_column=self.marks_column,
+            columns=self.record_columns,
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a profile from one entry of a profiles file.
+
+        Args:
+            data (dict): The entry. 'name' is required; 'url' maps to base_url and
+                         'start'/'end' to roll_range. Other keys match the constructor.
+
+        Returns:
+            BoardProfile: The profile.
+
+        Raises:
+            ValueError: If the entry is missing its name or has unknown keys.
+        """
+        unknown = set(data) - PROFILE_KEYS
+        if unknown:
+            raise ValueError(f"Unknown profile keys: {', '.join(sorted(unknown))}")
+        if not data.get("name"):
+            raise ValueError("Every profile needs a 'name'.")
+        options = {key: value for key, value in data.items() if key not in ("url", "start", "end")}
+        if "url" in data:
+            options["base_url"] = data["url"]
+        if ("start" in data) != ("end" in data):
+            raise ValueError(f"Profile '{data['name']}' must give both 'start' and 'end'.")
+        if "start" in data:
+            options["roll_range"] = (int(data["start"]), int(data["end"]))
+        return cls(**options)
+
+
+def load_profiles(path):
+    """
+    Reads board profiles from a JSON file, either a list of profile entries or
+    an object with a "profiles" list. For example:
+
+        {"profiles": [
+            {"name": "sargodha-matric-2025", "start": 520001, "end": 560000},
+            {"name": "other-board-ssc", "url": "http://example.org/result.aspx",
+             "roll_field": "txtRollNo", "form_fields": {"btnSearch": "Search"},
+             "start": 100001, "end": 140000}
+        ]}
+
+    Args:
+        path (str): The JSON file.
+
+    Returns:
+        list of BoardProfile: The profiles, in file order.
+
+    Raises:
+        ValueError: If an entry is invalid or two profiles share a name.
+    """
+    with open(path, encoding="utf-8") as profiles_file:
+        data = json.load(profiles_file)
+    entries = data.get("profiles", []) if isinstance(data, dict) else data
+    profiles = [BoardProfile.from_dict(entry) for entry in entries]
+    names = [profile.name for profile in profiles]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Profile names must be unique: {', '.join(sorted(duplicates))}")
+    return profiles
+
+
+class ProfileCrawl:
+    """
+    One profile's share of a multi-profile crawl.
+    """
+
+    def __init__(self, profile, roll_numbers, fetch_func, on_result=None, on_failure=None):
+        """
+        Args:
+            profile (BoardProfile): The page being crawled.
+            roll_numbers (list of str): Roll numbers to look up.
+            fetch_func (callable): Blocking lookup function for this profile.
+            on_result (callable or None): Called as on_result(roll_no, result).
+            on_failure (callable or None): Called as on_failure(roll_no, error).
+        """
+        self.profile = profile
+        self.roll_numbers = roll_numbers
+        self.fetch_func = fetch_func
+        self.on_result = on_result
+        self.on_failure = on_failure
+
+
+def crawl_profiles(crawls, make_scheduler):
+    """
+    Crawls several profiles at the same time in one event loop.
+
+    Profiles on the same host share one scheduler, so that host's concurrency
+    limit, rate limit, Retry-After pauses and circuit breaker cover all of
+    them together, while different hosts are crawled independently. All
+    lookups run on one thread pool, and each worker thread reuses its
+    sessions across profiles.
+
+    Args:
+        crawls (list of ProfileCrawl): The crawls to run.
+        make_scheduler (callable): Called as make_scheduler(host) to create the
+                                   AdaptiveScheduler of each host.
+
+    Returns:
+        dict: host -> the AdaptiveScheduler that crawled it.
+    """
+    schedulers = {}
+    for crawl in crawls:
+        if crawl.profile.host not in schedulers:
+            schedulers[crawl.profile.host] = make_scheduler(crawl.profile.host)
+
+    async def run_all():
+        thread_count = max(1, sum(scheduler.max_concurrency for scheduler in schedulers.values()))
+        with ThreadPoolExecutor(max_workers=thread_count) as executor:
+            await asyncio.gather(*(
+                schedulers[crawl.profile.host].run(crawl.roll_numbers, crawl.fetch_func, on_result=crawl.on_result,
+                                                   on_failure=crawl.on_failure, executor=executor)
+                for crawl in crawls if crawl.roll_numbers
+            ))
+
+    asyncio.run(run_all())
+    return schedulers
@@ -0,0 +1,324 @@
+import numpy as np
+import pandas as pd
+
+from bise_failed_subjects import SUBJECT_BITS, failed_subject_masks
+from bise_parser import RECORD_COLUMNS, SUBJECT_COLUMN_MAP
+
+# Subject columns of a record, in sheet order
+SUBJECT_RECORD_COLUMNS = [column for column in RECORD_COLUMNS if column in SUBJECT_COLUMN_MAP.values()]
+
+# Stored for a subject the student did not take, or whose marks are not a number (e.g. "ABSENT")
+MISSING_MARK = -1
+
+FORMAT_VERSION = 1
+
+
+def pack_strings(values):
+    """
+    Packs strings into one UTF-8 byte buffer plus offsets, which takes far less
+    memory than a list of Python strings or a fixed-width numpy string array.
+
+    Args:
+        values (iterable of str): The strings.
+
+    Returns:
+        tuple: (uint8 array of the bytes, int64 array of len(values) + 1 offsets)
+    """
+    encoded = [str(value).encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8).copy(), offsets
+
+
+class PackedStrings:
+    """
+    Read-only sequence view over strings packed by pack_strings.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_values(cls, values):
+        return cls(*pack_strings(values))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+
+def result_status(overall_result):
+    """
+    Returns the status word an 'overall result' starts with, e.g. "PASS" or "FAIL".
+    """
+    words = str(overall_result).split()
+    return words[0].upper() if words else ""
+
+
+class ResultStore:
+    """
+    Column-oriented, typed copy of the found student records for fast
+    aggregate queries.
+
+    Marks are an int16 matrix with one column per subject (MISSING_MARK where
+    there is none). The 'overall result' strings and the status word they start
+    with are stored as categoricals: a small array of distinct values plus an
+    integer code per student. Failed subjects are a uint16 bitmask per student
+    (see bise_failed_subjects.SUBJECT_BITS). Names are packed into single byte
+    buffers. A full board fits in a few megabytes and every query is a
+    vectorized pass over these arrays.
+
+    Usage:
+        store = ResultStore.from_records(checkpoint.found_records())
+        store.save("bise_results.npz")
+        print(ResultStore.load("bise_results.npz").pass_rates())
+    """
+
+    def __init__(self, roll_numbers, marks, subjects, result_codes, results, status_codes, statuses, failed_masks,
+                 names, father_names, source_version=None):
+        """
+        Args:
+            roll_numbers (numpy.ndarray): int64 roll number per student, ascending.
+            marks (numpy.ndarray): int16 matrix of marks, students x subjects.
+            subjects (list of str): Subject column names of the marks matrix.
+            result_codes (numpy.ndarray): int32 code per student into `results`.
+            results (list of str): Distinct 'overall result' strings.
+            status_codes (numpy.ndarray): uint8 code per student into `statuses`.
+            statuses (list of str): Distinct status words.
+            failed_masks (numpy.ndarray): uint16 failed-subject bitmask per student.
+            names (PackedStrings): Candidate names.
+            father_names (PackedStrings): Father names.
+            source_version (list or None): Version of the data the store was built from,
+                                           used to tell whether it is out of date.
+        """
+        self.roll_numbers = roll_numbers
+        self.marks = marks
+        self.subjects = list(subjects)
+        self.result_codes = result_codes
+        self.results = list(results)
+        self.status_codes = status_codes
+        self.statuses = list(statuses)
+        self.failed_masks = failed_masks
+        self.names = names
+        self.father_names = father_names
+        self.source_version = source_version
+
+    @classmethod
+    def from_records(cls, records, source_version=None):
+        """
+        Builds the store from student records.
+
+        Args:
+            records (iterable of dict): Records shaped like the parser's output. May be a generator.
+            source_version (list or None): Version stamp of the records' source.
+
+        Returns:
+            ResultStore: The store, ordered by roll number.
+        """
+        frame = pd.DataFrame.from_records(list(records), columns=RECORD_COLUMNS)
+        frame['Roll-No'] = pd.to_numeric(frame['Roll-No'], errors='coerce')
+        frame = frame.dropna(subset=['Roll-No']).sort_values('Roll-No', kind='stable')
+        frame = frame.drop_duplicates('Roll-No', keep='last').reset_index(drop=True)
+        frame = frame.fillna('')
+
+        marks = np.empty((len(frame), len(SUBJECT_RECORD_COLUMNS)), dtype=np.int16)
+        for index, column in enumerate(SUBJECT_RECORD_COLUMNS):
+            marks[:, index] = pd.to_numeric(frame[column], errors='coerce').fillna(MISSING_MARK).to_numpy()
+
+        overall = frame['overall result'].astype(str)
+        result_codes, results = pd.factorize(overall, sort=True)
+        status_codes, statuses = pd.factorize(overall.map(result_status), sort=True)
+        return cls(
+            roll_numbers=frame['Roll-No'].to_numpy(dtype=np.int64),
+            marks=marks,
+            subjects=SUBJECT_RECORD_COLUMNS,
+            result_codes=result_codes.astype(np.int32),
+            results=list(results),
+            status_codes=status_codes.astype(np.uint8),
+            statuses=list(statuses),
+            failed_masks=failed_subject_masks(overall).to_numpy(),
+            names=PackedStrings.from_values(frame['Candidate Name']),
+            father_names=PackedStrings.from_values(frame['Father Name']),
+            source_version=source_version,
+        )
+
+    def save(self, path):
+        """
+        Writes the store to a compressed .npz file.
+
+        Args:
+            path (str): Destination file. numpy adds ".npz" if it is missing.
+        """
+        results_data, results_offsets = pack_strings(self.results)
+        statuses_data, statuses_offsets = pack_strings(self.statuses)
+        subjects_data, subjects_offsets = pack_strings(self.subjects)
+        np.savez_compressed(
+            path,
+            format_version=np.array(FORMAT_VERSION),
+            source_version=np.array(self.source_version if self.source_version is not None else [], dtype=np.float64),
+            roll_numbers=self.roll_numbers,
+            marks=self.marks,
+            subjects_data=subjects_data,
+            subjects_offsets=subjects_offsets,
+            result_codes=self.result_codes,
+            results_data=results_data,
+            results_offsets=results_offsets,
+            status_codes=self.status_codes,
+            statuses_data=statuses_data,
+            statuses_offsets=statuses_offsets,
+            failed_masks=self.failed_masks,
+            names_data=self.names.data,
+            names_offsets=self.names.offsets,
+            father_names_data=self.father_names.data,
+            father_names_offsets=self.father_names.offsets,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a store written by save().
+
+        Args:
+            path (str): The .npz file.
+
+        Returns:
+            ResultStore: The loaded store.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            if int(arrays['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"'{path}' was written in an unsupported format version.")
+            source_version = arrays['source_version'].tolist() or None
+            return cls(
+                roll_numbers=arrays['roll_numbers'],
+                marks=arrays['marks'],
+                subjects=list(PackedStrings(arrays['subjects_data'], arrays['subjects_offsets'])),
+                result_codes=arrays['result_codes'],
+                results=list(PackedStrings(arrays['results_data'], arrays['results_offsets'])),
+                status_codes=arrays['status_codes'],
+                statuses=list(PackedStrings(arrays['statuses_data'], arrays['statuses_offsets'])),
+                failed_masks=arrays['failed_masks'],
+                names=PackedStrings(arrays['names_data'], arrays['names_offsets']),
+                father_names=PackedStrings(arrays['father_names_data'], arrays['father_names_offsets']),
+                source_version=source_version,
+            )
+
+    def __len__(self):
+        return len(self.roll_numbers)
+
+    def record(self, index):
+        """
+        Rebuilds the student record at a position in the store.
+
+        Args:
+            index (int): Position, 0 to len(store) - 1.
+
+        Returns:
+            dict: The record, keyed by column name. Missing marks are ''.
+        """
+        record = {'Roll-No': str(self.roll_numbers[index]), 'Candidate Name': self.names[index],
+                  'Father Name': self.father_names[index]}
+        for subject, mark in zip(self.subjects, self.marks[index]):
+            record[subject] = '' if mark == MISSING_MARK else str(mark)
+        record['overall result'] = self.results[self.result_codes[index]]
+        return {column: record.get(column, '') for column in RECORD_COLUMNS}
+
+    def status_counts(self):
+        """
+        Returns:
+            pandas.Series: Number of students per status word, e.g. PASS / FAIL.
+        """
+        counts = np.bincount(self.status_codes, minlength=len(self.statuses))
+        return pd.Series(counts, index=self.statuses, name='students').sort_values(ascending=False)
+
+    def pass_rates(self):
+        """
+        Pass rate of every subject among the students who have marks in it. A
+        student fails a subject when the subject is listed in their 'overall
+        result', the same rule used to highlight the Excel cells.
+
+        Returns:
+            pandas.DataFrame: Indexed by subject, with columns appeared, failed and pass_rate.
+        """
+        appeared = (self.marks != MISSING_MARK).sum(axis=0)
+        failed = np.array([np.count_nonzero(self.failed_masks & SUBJECT_BITS[subject]) for subject in self.subjects])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pass_rate = np.where(appeared > 0, 1 - failed / appeared, np.nan)
+        return pd.DataFrame({'appeared': appeared, 'failed': failed, 'pass_rate': pass_rate},
+                            index=pd.Index(self.subjects, name='subject'))
+
+    def top_students(self, n=10, subject=None):
+        """
+        Finds the students with the highest marks.
+
+        Args:
+            n (int): Number of students to return.
+            subject (str or None): Rank by this subject's marks. None ranks by the
+                                   total of all subject marks.
+
+        Returns:
+            pandas.DataFrame: Roll-No, Candidate Name and the marks, best first.
+        """
+        if subject is None:
+            scores = np.where(self.marks == MISSING_MARK, 0, self.marks).sum(axis=1, dtype=np.int32)
+            label = 'total'
+        else:
+            scores = self.marks[:, self.subjects.index(subject)].astype(np.int32)
+            label = subject
+        n = min(n, len(scores))
+        if n <= 0:
+            return pd.DataFrame(columns=['Roll-No', 'Candidate Name', label])
+        # Partial selection, then sort only the n winners; ties go to the lower roll number
+        best = np.argpartition(-scores, n - 1)[:n]
+        best = best[np.lexsort((self.roll_numbers[best], -scores[best]))]
+        return pd.DataFrame({
+            'Roll-No': self.roll_numbers[best],
+            'Candidate Name': [self.names[index] for index in best],
+            label: scores[best],
+        })
+
+    def failures_by_subject(self):
+        """
+        Returns:
+            pandas.Series: Number of students failing each subject, most failed first.
+        """
+        counts = {subject: np.count_nonzero(self.failed_masks & bit) for subject, bit in SUBJECT_BITS.items()}
+        return pd.Series(counts, name='students').sort_values(ascending=False)
+
+    def failed_subject_counts(self):
+        """
+        Distribution of how many subjects students failed.
+
+        Returns:
+            pandas.Series: Number of students indexed by number of failed subjects (0, 1, 2, ...).
+        """
+        masks = self.failed_masks.astype(np.uint16)
+        counts = np.zeros(len(masks), dtype=np.uint8)
+        for bit in SUBJECT_BITS.values():
+            counts += (masks & bit) != 0
+        return pd.Series(np.bincount(counts), name='students').rename_axis('failed subjects')
+
+    def failure_combinations(self, n=10):
+        """
+        Most common sets of failed subjects among students who failed at least one.
+
+        Args:
+            n (int): Number of combinations to return.
+
+        Returns:
+            pandas.Series: Number of students indexed by the failed subjects, joined with ', '.
+        """
+        masks, counts = np.unique(self.failed_masks[self.failed_masks != 0], return_counts=True)
+        order = np.argsort(-counts, kind='stable')[:n]
+        labels = [', '.join(subject for subject, bit in SUBJECT_BITS.items() if masks[index] & bit)
+                  for index in order]
+        return pd.Series(counts[order], index=labels, name='students')
@@ -0,0 +1,455 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bise_metrics import metrics
+
+# Responses meaning the server is overloaded and we should back off
+OVERLOAD_STATUS_CODES = (429, 503)
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests so that no single host receives more than
+    `requests_per_second` new requests per second.
+
+    Each host gets its own schedule, so crawling one board never slows down
+    requests going to another.
+    """
+
+    def __init__(self, requests_per_second):
+        """
+        Args:
+            requests_per_second (float): Maximum number of requests started per
+                                         second for each host.
+        """
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be a positive number.")
+        self.interval = 1.0 / requests_per_second
+        self._next_slot = {}
+        self._locks = {}
+
+    async def acquire(self, host):
+        """
+        Waits until the next request slot for `host` is available.
+
+        Args:
+            host (str): The host name the request is going to.
+        """
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a server that keeps failing.
+
+    After `failure_threshold` consecutive failures the breaker opens and no
+    requests are allowed for `reset_timeout` seconds. It then lets a single
+    probe through (half-open): success closes it again, failure re-opens it
+    with the timeout doubled, up to `max_reset_timeout`. After
+    `max_failed_probes` probes in a row have failed the server is taken to be
+    down and the breaker gives up, so a crawl can end instead of waiting on
+    it indefinitely.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=10, reset_timeout=5.0, max_reset_timeout=120.0, max_failed_probes=3):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker.
+            reset_timeout (float): Seconds the breaker stays open the first time.
+            max_reset_timeout (float): Upper bound for the growing open period.
+            max_failed_probes (int or None): Failed probes in a row after which the breaker
+                                             gives up. None keeps probing forever.
+        """
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self.max_failed_probes = max_failed_probes
+        self.failed_probes = 0
+        self._probe_in_flight = False
+
+    @property
+    def gave_up(self):
+        return self.max_failed_probes is not None and self.failed_probes >= self.max_failed_probes
+
+    def seconds_until_allowed(self):
+        """
+        Returns:
+            float: 0 if a request may be sent now, otherwise how long to wait.
+        """
+        if self.state == self.CLOSED:
+            return 0.0
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                return remaining
+            self.state = self.HALF_OPEN
+        # Half-open: only one probe at a time
+        if self._probe_in_flight:
+            return min(1.0, self.reset_timeout)
+        self._probe_in_flight = True
+        return 0.0
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.failed_probes = 0
+        self._probe_in_flight = False
+        if self.state != self.CLOSED:
+            self.state = self.CLOSED
+            self.reset_timeout = self.base_reset_timeout
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+            self.failed_probes += 1
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            self._open()
+        elif self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.open_count += 1
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase / multiplicative-decrease controller for the number of
+    lookups in flight.
+
+    The limit grows by one after a full window of fast, successful lookups and
+    is halved whenever a lookup fails or its latency rises above
+    `latency_target`, so the crawl settles at what the server can take.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, latency_target=5.0):
+        """
+        Args:
+            initial (int): Starting limit.
+            minimum (int): The limit never drops below this.
+            maximum (int): The limit never grows above this.
+            latency_target (float): Seconds per lookup above which the server counts as slow.
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.latency_target = latency_target
+        self._successes = 0
+        self._last_decrease = 0.0
+
+    def record_success(self, latency):
+        if latency > self.latency_target:
+            self._decrease()
+            return
+        self._successes += 1
+        if self._successes >= self.limit:
+            self._successes = 0
+            self.limit = min(self.maximum, self.limit + 1)
+
+    def record_failure(self):
+        self._decrease()
+
+    def _decrease(self):
+        # Failures arriving together come from the same overload, so halve only once per second
+        now = time.monotonic()
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self._successes = 0
+        self.limit = max(self.minimum, self.limit // 2)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: attempt n waits a random time
+    between 0 and min(max_delay, base_delay * 2**n). A Retry-After sent by
+    the server is used as the lower bound.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=60.0):
+        """
+        Args:
+            max_attempts (int): Tries per roll number before it goes to the retry queue.
+            base_delay (float): Backoff of the first retry, in seconds.
+            max_delay (float): Longest backoff, in seconds.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Args:
+            attempt (int): Number of attempts made so far (1 after the first failure).
+            retry_after (float or None): Seconds requested by the server.
+
+        Returns:
+            float: Seconds to wait before the next attempt.
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            return max(backoff, min(retry_after, self.max_delay))
+        return backoff
+
+
+class ServerUnavailableError(Exception):
+    """
+    Reported for the roll numbers left unfetched when the circuit breaker
+    gives up on a server.
+    """
+
+
+def is_overload_error(error):
+    """
+    Tells whether a failure means the server is overloaded (429/503 or no
+    response at all) rather than a problem with one request.
+    """
+    status_code = getattr(error, "status_code", None)
+    return status_code is None or status_code in OVERLOAD_STATUS_CODES
+
+
+class AdaptiveScheduler:
+    """
+    Runs lookups for many roll numbers against one server while adapting to
+    how the server behaves: the number of lookups in flight follows latency
+    and errors, failed lookups are retried with jittered exponential backoff,
+    429/503 Retry-After pauses are honoured for the whole host, and a circuit
+    breaker halts all traffic while the server keeps failing.
+
+    Roll numbers that still fail after every retry end up in `retry_queue`
+    instead of being dropped. So do all the roll numbers not fetched yet once
+    the circuit breaker gives up on the server; the run then ends, reporting
+    each of them to on_failure with a ServerUnavailableError.
+
+    pause(), resume() and cancel() may be called from any thread while a run
+    is in progress. Pausing lets lookups in flight finish but starts no new
+    ones; cancelling ends the run as soon as the lookups in flight are done,
+    leaving the remaining roll numbers unfetched.
+    """
+
+    def __init__(self, max_concurrency=16, initial_concurrency=4, requests_per_second=None, host="default",
+                 retry_policy=None, breaker=None, latency_target=5.0):
+        """
+        Args:
+            max_concurrency (int): Upper bound for lookups in flight.
+            initial_concurrency (int): Lookups in flight at the start.
+            requests_per_second (float or None): Hard per-host limit on lookups started per second.
+            host (str): Host name used as the rate limiting key.
+            retry_policy (RetryPolicy or None): Backoff settings. Defaults to RetryPolicy().
+            breaker (CircuitBreaker or None): Circuit breaker. Defaults to CircuitBreaker().
+            latency_target (float): Seconds per lookup above which concurrency is reduced.
+        """
+        self.max_concurrency = max_concurrency
+        self.host = host
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, 1, max_concurrency, latency_target)
+        self.limiter = HostRateLimiter(requests_per_second) if requests_per_second else None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.paused_until = 0.0
+        self.in_flight = 0
+        self._slot_freed = None
+        self._loop = None
+        self.retry_queue = []
+        self.last_error = None
+        self.stats = {"attempts": 0, "retries": 0, "failures": 0, "succeeded": 0}
+        self.cancelled = False
+        self._resumed = threading.Event()
+        self._resumed.set()
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def cancel(self):
+        self.cancelled = True
+        self._resumed.set()
+
+    async def _wait_for_slot(self):
+        """
+        Returns:
+            bool: True once a slot is taken; False if the run was cancelled or the
+                  circuit breaker gave up, in which case no slot is taken.
+        """
+        while True:
+            if self.cancelled or self.breaker.gave_up:
+                return False
+            if not self._resumed.is_set():
+                await asyncio.sleep(0.1)
+                continue
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            breaker_wait = self.breaker.seconds_until_allowed()
+            if breaker_wait > 0:
+                await asyncio.sleep(breaker_wait)
+                continue
+            async with self._slot_freed:
+                if self.in_flight < self.concurrency.limit:
+                    self.in_flight += 1
+                    return True
+                await self._slot_freed.wait()
+
+    async def _release_slot(self):
+        async with self._slot_freed:
+            self.in_flight -= 1
+            self._slot_freed.notify_all()
+
+    def _record_failure(self, error):
+        self.stats["failures"] += 1
+        self.last_error = error
+        self.breaker.record_failure()
+        if is_overload_error(error):
+            self.concurrency.record_failure()
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    async def run(self, roll_numbers, fetch_func, on_result=None, on_failure=None, executor=None):
+        """
+        Looks up every roll number.
+
+        Several runs may share one scheduler at the same time (e.g. crawls of
+        different pages on the same host); they then share its concurrency
+        limit, rate limit, pauses and circuit breaker.
+
+        Args:
+            roll_numbers (list of str): Roll numbers to look up.
+            fetch_func (callable): Blocking function taking a roll number and returning
+                                   a record or None; raises an exception when the lookup fails.
+            on_result (callable or None): Called as on_result(roll_no, result) after a successful lookup.
+            on_failure (callable or None): Called as on_failure(roll_no, error) when a roll
+                                           number has used up all its attempts.
+            executor (ThreadPoolExecutor or None): Thread pool to run the lookups on.
+                                                   Defaults to a pool of `max_concurrency` threads.
+
+        Returns:
+            list of tuple: (roll_no, result) for every successful lookup, in input order.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slot_freed = asyncio.Condition()
+        queue = asyncio.Queue()
+        for index, roll_no in enumerate(roll_numbers):
+            queue.put_nowait((index, roll_no, 1))
+        results = [None] * len(roll_numbers)
+        remaining = len(roll_numbers)
+        all_done = asyncio.Event()
+        if not remaining:
+            return []
+
+        def finish():
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0:
+                all_done.set()
+
+        async def retry_later(item, delay):
+            # Wake early if the breaker gives up, so the roll is handed back at once
+            deadline = time.monotonic() + delay
+            while not self.breaker.gave_up and not self.cancelled and time.monotonic() < deadline:
+                await asyncio.sleep(min(0.5, deadline - time.monotonic()))
+            queue.put_nowait(item)
+
+        def give_up(roll_no, error):
+            self.retry_queue.append(roll_no)
+            metrics.increment("failed")
+            if on_failure:
+                on_failure(roll_no, error)
+            finish()
+
+        async def worker(executor):
+            while True:
+                index, roll_no, attempt = await queue.get()
+                if not await self._wait_for_slot():
+                    if self.breaker.gave_up and not self.cancelled:
+                        give_up(roll_no, ServerUnavailableError(
+                            f"{self.host} kept failing after {self.breaker.failed_probes} circuit breaker probes; "
+                            f"last error: {self.last_error}"))
+                    continue
+                if self.limiter:
+                    await self.limiter.acquire(self.host)
+                self.stats["attempts"] += 1
+                started = time.monotonic()
+                try:
+                    result = await loop.run_in_executor(executor, fetch_func, roll_no)
+                except Exception as error:
+                    self._record_failure(error)
+                    await self._release_slot()
+                    if attempt < self.retry_policy.max_attempts:
+                        self.stats["retries"] += 1
+                        metrics.increment("retries")
+                        delay = self.retry_policy.delay(attempt, getattr(error, "retry_after", None))
+                        loop.create_task(retry_later((index, roll_no, attempt + 1), delay))
+                    else:
+                        give_up(roll_no, error)
+                    continue
+                self.stats["succeeded"] += 1
+                self.breaker.record_success()
+                self.concurrency.record_success(time.monotonic() - started)
+                await self._release_slot()
+                results[index] = (roll_no, result)
+                if on_result:
+                    on_result(roll_no, result)
+                finish()
+
+        async def watch_for_cancel():
+            # Let lookups already sent finish and report before the run ends
+            while not all_done.is_set():
+                if self.cancelled and self.in_flight == 0:
+                    all_done.set()
+                await asyncio.sleep(0.1)
+
+        async def run_workers(executor):
+            workers = [loop.create_task(worker(executor)) for _ in range(self.max_concurrency)]
+            workers.append(loop.create_task(watch_for_cancel()))
+            await all_done.wait()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if executor is not None:
+            await run_workers(executor)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                await run_workers(executor)
+        return [item for item in results if item is not None]
+
+
+def run_scheduled(roll_numbers, fetch_func, scheduler, on_result=None, on_failure=None, executor=None):
+    """
+    Synchronous wrapper around AdaptiveScheduler.run for callers that are not
+    running an event loop.
+
+    Returns:
+        list of tuple: (roll_no, result) for every successful lookup, in input order.
+    """
+    return asyncio.run(scheduler.run(roll_numbers, fetch_func, on_result=on_result, on_failure=on_failure,
+                                     executor=executor))
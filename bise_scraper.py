@@ -0,0 +1,192 @@
+import logging
+import threading
+
+import requests
+
+from bise_metrics import metrics
+from bise_page_cache import DEFAULT_MAX_BYTES, PageCache
+from bise_parser import parse_result_page
+from bise_session import BASE_URL, TokenError, get_worker_session
+
+logger = logging.getLogger(__name__)
+
+
+class FetchError(Exception):
+    """
+    Raised when a roll number could not be looked up because of a network or
+    server problem, as opposed to the roll number having no result.
+    """
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        """
+        Args:
+            message (str): Description of the failure.
+            status_code (int or None): HTTP status of the failed response, if any.
+            retry_after (float or None): Seconds the server asked us to wait (Retry-After).
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(response):
+    """
+    Reads a Retry-After header given in seconds.
+
+    Args:
+        response (requests.Response or None): The failed response.
+
+    Returns:
+        float or None: Seconds to wait, or None if the header is missing or not a number.
+    """
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After", "").strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def fetch_bise_result(roll_no, base_url=BASE_URL, session=None, page_cache=None, exam_session=None, profile=None):
+    """
+    Looks up one roll number and parses the result page.
+
+    Args:
+        roll_no (str): The roll number to search for.
+        base_url (str): URL of the result page. Defaults to the BISE Sargodha result day page.
+        session (BiseSession or None): Session to send the request on. Defaults to
+                                       the calling thread's shared session.
+        page_cache (PageCache or None): When given, the raw page is stored in it
+                                        so it can be parsed again offline.
+        exam_session (str or None): Cache key for the exam session. Defaults to `base_url`.
+        profile (BoardProfile or None): Page profile of another board or session. Its
+                                        URL, search form and layout replace the defaults.
+
+    Returns:
+        dict or None: The student's record, or None if the board has no result
+                      for this roll number.
+
+    Raises:
+        FetchError: If the lookup failed and is worth retrying later.
+    """
+    if profile is not None:
+        base_url = profile.base_url
+    if session is None:
+        session = get_worker_session(base_url, profile)
+
+    try:
+        # Submit the search form, reusing this session's cached tokens
+        logger.debug("Sending POST request for Roll No: %s...", roll_no)
+        result_html = session.post_roll_number(roll_no)
+    except TokenError as e:
+        metrics.increment("fetch_errors")
+        raise FetchError(str(e)) from e
+    except requests.exceptions.RequestException as e:
+        metrics.increment("fetch_errors")
+        response = getattr(e, "response", None)
+        raise FetchError(
+            f"Error during request for Roll No {roll_no}: {e}",
+            status_code=response.status_code if response is not None else None,
+            retry_after=parse_retry_after(response),
+        ) from e
+
+    if page_cache is not None:
+        page_cache.put(exam_session or base_url, roll_no, result_html)
+
+    try:
+        with metrics.span("parse"):
+            student_record = profile.parse(result_html) if profile is not None else parse_result_page(result_html)
+    except Exception as e:
+        metrics.increment("fetch_errors")
+        raise FetchError(f"An error occurred during parsing or data extraction for Roll No {roll_no}: {e}") from e
+
+    if student_record is None:
+        metrics.increment("not_found")
+        logger.info("No result found for Roll No: %s. It might be an invalid roll number or the page structure changed.",
+                    roll_no)
+    else:
+        metrics.increment("found")
+    return student_record
+
+
+class ResultFetcher:
+    """
+    A lookup function with its settings bound, suitable for the fetch
+    schedulers and picklable so it can be handed to worker processes. Each
+    process opens its own page cache on first use; the worker threads of a
+    process share it.
+    """
+
+    def __init__(self, base_url=BASE_URL, cache_dir=None, exam_session=None, cache_max_bytes=DEFAULT_MAX_BYTES,
+                 profile=None):
+        """
+        Args:
+            base_url (str): URL of the result page. Ignored when `profile` is given.
+            cache_dir (str or None): Page cache directory. None disables the cache.
+            exam_session (str or None): Cache key for the exam session. Defaults to the
+                                        profile name, or `base_url` without a profile.
+            cache_max_bytes (int): Size limit of the page cache.
+            profile (BoardProfile or None): Page profile of the board or session to crawl.
+        """
+        self.profile = profile
+        self.base_url = profile.base_url if profile is not None else base_url
+        self.cache_dir = cache_dir
+        self.exam_session = exam_session or (profile.name if profile is not None else base_url)
+        self.cache_max_bytes = cache_max_bytes
+        self._page_cache = None
+        self._page_cache_lock = threading.Lock()
+
+    @property
+    def page_cache(self):
+        if self.cache_dir and self._page_cache is None:
+            # Worker threads make their first lookups together; only one of them may open the cache
+            with self._page_cache_lock:
+                if self._page_cache is None:
+                    self._page_cache = PageCache(self.cache_dir, self.cache_max_bytes)
+        return self._page_cache
+
+    def __call__(self, roll_no):
+        return fetch_bise_result(roll_no, base_url=self.base_url, page_cache=self.page_cache,
+                                 exam_session=self.exam_session, profile=self.profile)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_page_cache"] = None
+        del state["_page_cache_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._page_cache_lock = threading.Lock()
+
+    def close(self):
+        with self._page_cache_lock:
+            if self._page_cache is not None:
+                self._page_cache.close()
+                self._page_cache = None
+
+
+def retrieve_bise_result(roll_no, base_url=BASE_URL, session=None):
+    """
+    Retrieves the BISE Sargodha Matric result for a given roll number.
+    The __VIEWSTATE and __EVENTVALIDATION tokens are fetched once per session and
+    reused for every POST; they are only fetched again when the server rejects
+    them or they expire.
+
+    Args:
+        roll_no (str): The roll number to search for.
+        base_url (str): URL of the result page. Defaults to the BISE Sargodha result day page.
+        session (BiseSession or None): Session to send the request on. Defaults to
+                                       the calling thread's shared session.
+
+    Returns:
+        dict or None: A dictionary containing the extracted student's result data
+                      in the desired column format, or None if the request fails
+                      or data cannot be parsed.
+    """
+    try:
+        return fetch_bise_result(roll_no, base_url=base_url, session=session)
+    except FetchError as e:
+        logger.warning("Error: %s", e)
+        return None
@@ -0,0 +1,254 @@
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bise_metrics import metrics
+from bise_parser import parse_tokens
+
+BASE_URL = "http://119.159.230.2/biseresultday/resultday.aspx"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Seconds to wait for the server to connect and to answer
+DEFAULT_TIMEOUT = (10, 60)
+
+# Fields of the search form sent with every POST, besides the tokens and the roll number
+SEARCH_FORM_FIELDS = {
+    "__LASTFOCUS": "",
+    "__EVENTTARGET": "",
+    "__EVENTARGUMENT": "",
+    "RbtSearchType": "Search by Roll No.",
+    "BtnShowResults": "Show Result",
+}
+
+# Text box of the search form that takes the roll number
+ROLL_NUMBER_FIELD = "TxtSearchText"
+
+# Connections kept open per host by the pools shared between workers
+SHARED_POOL_SIZE = 64
+
+# Messages ASP.NET puts in the error page when it refuses a stale or foreign ViewState
+TOKEN_REJECTED_MARKERS = (
+    "Invalid postback or callback argument",
+    "Validation of viewstate MAC failed",
+    "The state information is invalid",
+)
+
+
+class TokenError(Exception):
+    """Raised when the result page does not hand out __VIEWSTATE/__EVENTVALIDATION tokens."""
+
+
+def create_session(pool_size=10, adapter=None):
+    """
+    Creates a keep-alive requests Session whose connection pool can hold
+    `pool_size` open connections per host.
+
+    Args:
+        pool_size (int): Number of connections kept open for each host.
+        adapter (HTTPAdapter or None): Existing adapter to send requests through,
+                                       so several sessions share its connection pool.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    if adapter is None:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+class ViewStateCache:
+    """
+    Holds the __VIEWSTATE/__EVENTVALIDATION pair for one session so that many
+    POSTs can reuse a single GET. The pair is fetched again only after it is
+    invalidated (the server rejected it) or it is older than `max_age` seconds.
+    """
+
+    def __init__(self, max_age=900):
+        """
+        Args:
+            max_age (float): Seconds a token pair is trusted before it is refreshed.
+        """
+        self.max_age = max_age
+        self.tokens = None
+        self.fetched_at = 0.0
+        self.fetch_count = 0
+
+    def is_fresh(self):
+        return self.tokens is not None and (time.monotonic() - self.fetched_at) < self.max_age
+
+    def invalidate(self):
+        self.tokens = None
+
+    def get(self, session, base_url, timeout=None):
+        """
+        Returns a usable token pair, performing a GET only when needed.
+
+        Args:
+            session (requests.Session): Session used for the GET.
+            base_url (str): URL of the result page.
+            timeout (float or tuple or None): Timeout for the GET.
+
+        Returns:
+            tuple: (viewstate, eventvalidation)
+
+        Raises:
+            TokenError: If the page does not contain the tokens.
+            requests.exceptions.RequestException: If the GET fails.
+        """
+        if self.is_fresh():
+            return self.tokens
+
+        with metrics.span("get"):
+            response = session.get(base_url, timeout=timeout)
+        response.raise_for_status()
+        viewstate, eventvalidation = parse_tokens(response.text)
+        if not viewstate or not eventvalidation:
+            raise TokenError(f"Could not find __VIEWSTATE or __EVENTVALIDATION on {base_url}.")
+
+        self.tokens = (viewstate, eventvalidation)
+        self.fetched_at = time.monotonic()
+        self.fetch_count += 1
+        return self.tokens
+
+
+def is_token_rejected(response):
+    """
+    Tells whether the server refused the posted ViewState/EventValidation.
+
+    Args:
+        response (requests.Response): The POST response.
+
+    Returns:
+        bool: True if the tokens should be fetched again.
+    """
+    if response.status_code != 500:
+        return False
+    return any(marker in response.text for marker in TOKEN_REJECTED_MARKERS) or not response.text.strip()
+
+
+class BiseSession:
+    """
+    One worker's connection to the result page: a keep-alive session plus the
+    ViewState cache that goes with it. ASP.NET ties the tokens to the session
+    cookies, so each session keeps its own cache.
+    """
+
+    def __init__(self, base_url=BASE_URL, max_token_age=900, pool_size=2, timeout=DEFAULT_TIMEOUT,
+                 form_fields=SEARCH_FORM_FIELDS, roll_field=ROLL_NUMBER_FIELD, adapter=None):
+        """
+        Args:
+            base_url (str): URL of the result page.
+            max_token_age (float): Seconds cached tokens are reused before refreshing.
+            pool_size (int): Connections kept open per host.
+            timeout (float or tuple): Connect/read timeout for every request.
+            form_fields (dict): Search form fields posted besides the tokens and the roll number.
+            roll_field (str): Name of the form field taking the roll number.
+            adapter (HTTPAdapter or None): Shared adapter whose connection pool to use.
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.form_fields = form_fields
+        self.roll_field = roll_field
+        self.session = create_session(pool_size, adapter)
+        self._owns_adapter = adapter is None
+        self.tokens = ViewStateCache(max_token_age)
+
+    def post_roll_number(self, roll_no):
+        """
+        Submits the search form for a roll number and returns the result page HTML.
+        If the server rejects the cached tokens they are refreshed and the POST is
+        sent once more.
+
+        Args:
+            roll_no (str): The roll number to search for.
+
+        Returns:
+            str: HTML of the page returned by the POST.
+
+        Raises:
+            TokenError: If fresh tokens cannot be obtained.
+            requests.exceptions.RequestException: If a request fails.
+        """
+        for attempt in range(2):
+            viewstate, eventvalidation = self.tokens.get(self.session, self.base_url, timeout=self.timeout)
+            payload = dict(self.form_fields)
+            payload["__VIEWSTATE"] = viewstate
+            payload["__EVENTVALIDATION"] = eventvalidation
+            payload[self.roll_field] = roll_no
+            with metrics.span("post"):
+                response = self.session.post(self.base_url, data=payload, timeout=self.timeout)
+            if attempt == 0 and is_token_rejected(response):
+                self.tokens.invalidate()
+                continue
+            response.raise_for_status()
+            return response.text
+
+    def close(self):
+        # A shared adapter's pool belongs to every session using it
+        if self._owns_adapter:
+            self.session.close()
+
+
+_worker_sessions = threading.local()
+_shared_adapters = {}
+_shared_adapters_lock = threading.Lock()
+
+
+def shared_adapter(host, pool_size=SHARED_POOL_SIZE):
+    """
+    Returns the connection pool adapter shared by every worker talking to
+    `host` in this process. Sessions mounting it keep their own cookies and
+    tokens but reuse the same keep-alive connections.
+
+    Args:
+        host (str): Host name (with port, if any).
+        pool_size (int): Connections kept open to the host.
+
+    Returns:
+        HTTPAdapter: The shared adapter.
+    """
+    # Keyed by process too: a forked worker must not reuse its parent's sockets
+    key = (os.getpid(), host)
+    with _shared_adapters_lock:
+        adapter = _shared_adapters.get(key)
+        if adapter is None:
+            adapter = _shared_adapters[key] = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        return adapter
+
+
+def get_worker_session(base_url=BASE_URL, profile=None):
+    """
+    Returns the BiseSession belonging to the calling thread, creating it on
+    first use. Fetch engine workers run on a thread pool, so this gives every
+    worker one token GET per result page for the whole crawl, while the
+    connections to each host come from one pool shared by all workers.
+
+    Args:
+        base_url (str): URL of the result page. Ignored when `profile` is given.
+        profile (BoardProfile or None): Page profile describing the URL and search form.
+
+    Returns:
+        BiseSession: The calling thread's session for the page.
+    """
+    sessions = getattr(_worker_sessions, "sessions", None)
+    if sessions is None:
+        sessions = _worker_sessions.sessions = {}
+    key = ("profile", profile.name) if profile is not None else base_url
+    if key not in sessions:
+        if profile is not None:
+            sessions[key] = BiseSession(profile.base_url, form_fields=profile.form_fields,
+                                        roll_field=profile.roll_field, adapter=shared_adapter(profile.host))
+        else:
+            sessions[key] = BiseSession(base_url, adapter=shared_adapter(urlparse(base_url).netloc))
+    return sessions[key]
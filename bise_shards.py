@@ -0,0 +1,224 @@
+import glob
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+from bise_checkpoint import CheckpointStore
+from bise_metrics import format_eta, metrics
+from bise_scheduler import AdaptiveScheduler, RetryPolicy, run_scheduled
+
+SHARD_FILE_PATTERN = "shard_*.sqlite3"
+
+
+def split_into_shards(roll_numbers, shard_count):
+    """
+    Splits roll numbers into contiguous, nearly equal shards.
+
+    Args:
+        roll_numbers (list of str): Roll numbers in ascending order.
+        shard_count (int): Number of shards wanted.
+
+    Returns:
+        list of list of str: The non-empty shards, in roll number order.
+    """
+    shard_count = max(1, min(shard_count, len(roll_numbers)))
+    size, remainder = divmod(len(roll_numbers), shard_count)
+    shards = []
+    start = 0
+    for index in range(shard_count):
+        end = start + size + (1 if index < remainder else 0)
+        if end > start:
+            shards.append(roll_numbers[start:end])
+        start = end
+    return shards
+
+
+def shard_path(shard_dir, roll_numbers):
+    """
+    Returns the checkpoint file of a shard, named after the rolls it covers.
+    """
+    return os.path.join(shard_dir, f"shard_{roll_numbers[0]}_{roll_numbers[-1]}.sqlite3")
+
+
+def crawl_shard(shard_index, roll_numbers, path, fetcher, concurrency, requests_per_second, max_attempts,
+                progress_queue):
+    """
+    Worker process entry point: fetches and parses one shard and stores every
+    outcome in the shard's own checkpoint file.
+
+    Args:
+        shard_index (int): Position of the shard, used in progress messages.
+        roll_numbers (list of str): Roll numbers of this shard.
+        path (str): Checkpoint file for this shard.
+        fetcher (ResultFetcher): Lookup function with its settings bound.
+        concurrency (int): Concurrent lookups within this worker.
+        requests_per_second (float or None): This worker's share of the rate limit.
+        max_attempts (int): Tries per roll number before it is recorded as an error.
+        progress_queue (queue.Queue): Receives (shard_index, found) after each lookup.
+
+    Returns:
+        tuple: (shard_index, path, metrics snapshot of this worker)
+    """
+    # A forked worker starts with a copy of the parent's metrics
+    metrics.reset()
+    with CheckpointStore(path) as shard_store:
+        completed = shard_store.completed_rolls()
+        pending = [roll_no for roll_no in roll_numbers if int(roll_no) not in completed]
+        for roll_no in roll_numbers:
+            if int(roll_no) in completed:
+                progress_queue.put((shard_index, None))
+
+        def report(roll_no, student_result):
+            shard_store.record(roll_no, student_result)
+            progress_queue.put((shard_index, bool(student_result)))
+
+        def report_failure(roll_no, error):
+            shard_store.record_error(roll_no, str(error))
+            progress_queue.put((shard_index, False))
+
+        scheduler = AdaptiveScheduler(
+            max_concurrency=concurrency,
+            initial_concurrency=max(1, concurrency // 2),
+            requests_per_second=requests_per_second,
+            host=urlparse(fetcher.base_url).netloc,
+            retry_policy=RetryPolicy(max_attempts=max_attempts),
+        )
+        try:
+            run_scheduled(pending, fetcher, scheduler, on_result=report, on_failure=report_failure)
+        finally:
+            fetcher.close()
+    return shard_index, path, metrics.snapshot()
+
+
+class ShardProgress:
+    """
+    Tracks and prints how far each shard has got.
+    """
+
+    def __init__(self, shards, interval=2.0):
+        """
+        Args:
+            shards (list of list of str): The shards being crawled.
+            interval (float): Minimum seconds between progress lines.
+        """
+        self.totals = [len(shard) for shard in shards]
+        self.done = [0] * len(shards)
+        self.found = [0] * len(shards)
+        self.interval = interval
+        self.started = time.monotonic()
+        self._last_print = 0.0
+
+    def update(self, shard_index, found):
+        self.done[shard_index] += 1
+        if found:
+            self.found[shard_index] += 1
+
+    def print(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_print < self.interval:
+            return
+        self._last_print = now
+        parts = [
+            f"shard {index + 1}: {done}/{total} ({found} found)"
+            for index, (done, total, found) in enumerate(zip(self.done, self.totals, self.found))
+        ]
+        elapsed = now - self.started
+        done, total = sum(self.done), sum(self.totals)
+        rate = done / elapsed if elapsed > 0 else 0.0
+        parts.append(f"{rate:.1f} rolls/s, ETA {format_eta((total - done) / rate if rate else None)}")
+        print(f"[{elapsed:6.0f}s] " + " | ".join(parts))
+
+
+def run_sharded_crawl(roll_numbers, workers, shard_dir, fetcher, concurrency=8, requests_per_second=None,
+                      max_attempts=5):
+    """
+    Splits the roll numbers across a pool of worker processes, each running its
+    own fetch and parse pipeline into a shard checkpoint file, and prints
+    per-shard progress until all of them finish.
+
+    Args:
+        roll_numbers (list of str): Roll numbers to fetch, in ascending order.
+        workers (int): Number of worker processes.
+        shard_dir (str): Directory for the shard checkpoint files.
+        fetcher (ResultFetcher): Lookup function with its settings bound.
+        concurrency (int): Concurrent lookups within each worker.
+        requests_per_second (float or None): Overall rate limit, shared evenly between workers.
+        max_attempts (int): Tries per roll number before it is recorded as an error.
+
+    Returns:
+        list of str: Shard checkpoint files, in roll number order.
+    """
+    shards = split_into_shards(roll_numbers, workers)
+    if not shards:
+        return []
+    os.makedirs(shard_dir, exist_ok=True)
+    paths = [shard_path(shard_dir, shard) for shard in shards]
+    worker_rate = requests_per_second / len(shards) if requests_per_second else None
+    progress = ShardProgress(shards)
+
+    with multiprocessing.Manager() as manager:
+        progress_queue = manager.Queue()
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(crawl_shard, index, shard, path, fetcher, concurrency, worker_rate, max_attempts,
+                                progress_queue)
+                for index, (shard, path) in enumerate(zip(shards, paths))
+            ]
+            while not all(future.done() for future in futures):
+                try:
+                    shard_index, found = progress_queue.get(timeout=0.5)
+                    progress.update(shard_index, found)
+                except queue.Empty:
+                    pass
+                progress.print()
+            while not progress_queue.empty():
+                progress.update(*progress_queue.get())
+            # Surface any exception raised inside a worker, and collect the workers' metrics
+            for future in futures:
+                metrics.merge(future.result()[2])
+    progress.print(force=True)
+    return paths
+
+
+def merge_shards(paths, checkpoint):
+    """
+    Merges shard checkpoint files into the main checkpoint store in roll
+    number order, then deletes them. The merged outcomes are the same however
+    many workers produced them.
+
+    Args:
+        paths (list of str): Shard checkpoint files.
+        checkpoint (CheckpointStore): The main checkpoint store.
+
+    Returns:
+        int: Number of lookup outcomes merged.
+    """
+    stores = [CheckpointStore(path) for path in paths if os.path.exists(path)]
+    try:
+        merged = heapq.merge(*(store.outcomes() for store in stores), key=lambda outcome: outcome[0])
+        merged_count = checkpoint.record_many(merged)
+    finally:
+        for store in stores:
+            store.close()
+    for store in stores:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(store.path + suffix):
+                os.remove(store.path + suffix)
+    return merged_count
+
+
+def leftover_shards(shard_dir):
+    """
+    Lists shard files left behind by an interrupted sharded run.
+
+    Args:
+        shard_dir (str): Directory holding the shard checkpoint files.
+
+    Returns:
+        list of str: The shard files found.
+    """
+    return sorted(glob.glob(os.path.join(shard_dir, SHARD_FILE_PATTERN)))
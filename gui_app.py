@@ -1,31 +1,492 @@
+import queue
+import threading
+import time
 import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from urllib.parse import urlparse
+
+from bise_checkpoint import CheckpointStore, roll_numbers_in_excel
+from bise_excel import export_checkpoint_to_excel
+from bise_failed_subjects import failed_subject_mask
+from bise_metrics import format_eta, metrics
+from bise_parser import RECORD_COLUMNS
+from bise_scheduler import AdaptiveScheduler, RetryPolicy, run_scheduled
+from bise_scraper import ResultFetcher
+from bise_session import BASE_URL
+
+# How often the main loop collects results from the background workers, and
+# the most events handled per collection so the window stays responsive
+POLL_INTERVAL_MS = 100
+MAX_EVENTS_PER_POLL = 5000
+
+ROW_HEIGHT = 20
+HEADER_HEIGHT = 26
+
+# Light red, matching the failed-subject fill of the Excel file
+FAILED_ROW_COLOR = "#FFCCCC"
+
+
+class CrawlController:
+    """
+    Runs one crawl on a background thread and reports what happens through
+    `events`, a queue the Tk main loop drains:
+
+        ("loaded", rows)           rows already in the checkpoint, as value tuples
+        ("total", count)           roll numbers that will be looked up
+        ("result", roll_no, row)   a lookup finished; row is None when there was no result
+        ("failed", roll_no, text)  a roll number failed after every retry
+        ("finished", cancelled)    the crawl ended
+        ("error", text)            the crawl stopped because of an unexpected error
+
+    Every lookup is written to the checkpoint as it finishes, so a cancelled
+    crawl continues where it stopped the next time it is started.
+    """
+
+    def __init__(self, events, start, end, base_url=BASE_URL, concurrency=8, checkpoint_path="bise_checkpoint.sqlite3",
+                 cache_dir="bise_page_cache", max_attempts=5, output=None):
+        """
+        Args:
+            events (queue.Queue): Receives the crawl events.
+            start (int): First roll number.
+            end (int): Last roll number.
+            base_url (str): Result page URL.
+            concurrency (int): Maximum lookups in flight.
+            checkpoint_path (str): Checkpoint file recording every lookup.
+            cache_dir (str or None): Page cache directory. None disables the cache.
+            max_attempts (int): Tries per roll number.
+            output (str or None): Results workbook; roll numbers already in it are not fetched again.
+        """
+        self.events = events
+        self.start_roll_no = start
+        self.end_roll_no = end
+        self.checkpoint_path = checkpoint_path
+        self.output = output
+        self.fetcher = ResultFetcher(base_url=base_url, cache_dir=cache_dir)
+        self.scheduler = AdaptiveScheduler(
+            max_concurrency=concurrency,
+            initial_concurrency=max(1, concurrency // 2),
+            host=urlparse(base_url).netloc,
+            retry_policy=RetryPolicy(max_attempts=max_attempts),
+        )
+        self.thread = None
+        self._started = None
+        self._paused_at = None
+        self._paused_seconds = 0.0
+
+    def start(self):
+        self._started = time.monotonic()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def paused(self):
+        return self.scheduler.paused
+
+    def pause(self):
+        if not self.paused:
+            self._paused_at = time.monotonic()
+            self.scheduler.pause()
+
+    def resume(self):
+        if self.paused:
+            self._paused_seconds += time.monotonic() - self._paused_at
+            self._paused_at = None
+            self.scheduler.resume()
+
+    def cancel(self):
+        self.resume()
+        self.scheduler.cancel()
+
+    def active_seconds(self):
+        """
+        Returns:
+            float: Seconds the crawl has been running, not counting pauses.
+        """
+        if self._started is None:
+            return 0.0
+        paused = self._paused_seconds
+        if self._paused_at is not None:
+            paused += time.monotonic() - self._paused_at
+        return time.monotonic() - self._started - paused
+
+    def _run(self):
+        try:
+            # The checkpoint connection must be opened on the thread that uses it
+            with CheckpointStore(self.checkpoint_path) as checkpoint:
+                rows = [record_to_row(record) for record in checkpoint.found_records()]
+                self.events.put(("loaded", rows))
+
+                # Skip rolls finished by an earlier run or already present in the workbook
+                completed = checkpoint.completed_rolls()
+                if self.output:
+                    completed |= roll_numbers_in_excel(self.output)
+                roll_numbers = [str(roll) for roll in range(self.start_roll_no, self.end_roll_no + 1)
+                                if roll not in completed]
+                self.events.put(("total", len(roll_numbers)))
+
+                def report(roll_no, student_result):
+                    checkpoint.record(roll_no, student_result)
+                    self.events.put(("result", roll_no, record_to_row(student_result) if student_result else None))
+
+                def report_failure(roll_no, error):
+                    checkpoint.record_error(roll_no, str(error))
+                    self.events.put(("failed", roll_no, str(error)))
+
+                run_scheduled(roll_numbers, self.fetcher, self.scheduler, on_result=report, on_failure=report_failure)
+        except Exception as e:
+            self.events.put(("error", str(e)))
+        finally:
+            if self.fetcher.page_cache is not None:
+                self.fetcher.page_cache.evict()
+            self.fetcher.close()
+            self.events.put(("finished", self.scheduler.cancelled))
+
+
+class ExportJob:
+    """
+    Builds the Excel file from the checkpoint on a background thread and
+    reports ("exported", imported, rows) or ("export_error", text) through
+    `events`. It opens its own checkpoint connection, so it can run while a
+    crawl is still writing.
+    """
+
+    def __init__(self, events, checkpoint_path, filename):
+        self.events = events
+        self.checkpoint_path = checkpoint_path
+        self.filename = filename
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    @property
+    def running(self):
+        return self.thread.is_alive()
+
+    def _run(self):
+        try:
+            with CheckpointStore(self.checkpoint_path) as checkpoint:
+                imported, row_count = export_checkpoint_to_excel(checkpoint, self.filename)
+            self.events.put(("exported", imported, row_count))
+        except Exception as e:
+            self.events.put(("export_error", str(e)))
+
+
+def record_to_row(record):
+    return tuple(record.get(column, '') for column in RECORD_COLUMNS)
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Table over a Python list of row tuples that only creates widgets for the
+    rows on screen. Scrolling and new rows just change which slice of the list
+    those few Treeview items show, so the table costs the same with 50 rows or
+    500,000. While scrolled to the bottom it follows new rows as they arrive.
+    """
+
+    def __init__(self, master, columns, rows, widths=None):
+        """
+        Args:
+            master (tk.Widget): Parent widget.
+            columns (list of str): Column headings.
+            rows (list of tuple): The rows; the table reads it on every refresh().
+            widths (dict or None): Column name -> width in pixels.
+        """
+        super().__init__(master)
+        self.rows = rows
+        self.offset = 0
+        self.visible = 1
+        self.follow = True
+        self._items = []
+
+        style = ttk.Style(self)
+        style.configure("Virtual.Treeview", rowheight=ROW_HEIGHT)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="none",
+                                 style="Virtual.Treeview", height=1)
+        widths = widths or {}
+        for column in columns:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=widths.get(column, 80), stretch=True, anchor="w")
+        self.tree.tag_configure("failed", background=FAILED_ROW_COLOR)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.bind("<Configure>", self._on_resize)
+        for widget in (self.tree, self.scrollbar):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda event: self.scroll_by(-3))
+            widget.bind("<Button-5>", lambda event: self.scroll_by(3))
+
+    def _max_offset(self):
+        return max(0, len(self.rows) - self.visible)
+
+    def _on_resize(self, event):
+        self.visible = max(1, (event.height - HEADER_HEIGHT) // ROW_HEIGHT)
+        self.tree.configure(height=self.visible)
+        self.refresh()
+
+    def _on_mousewheel(self, event):
+        self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        elif action == "scroll":
+            self.scroll_by(int(amount) * (self.visible if unit == "pages" else 1))
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+
+    def scroll_to(self, offset):
+        self.offset = max(0, min(offset, self._max_offset()))
+        self.follow = self.offset >= self._max_offset()
+        self.refresh()
+
+    def refresh(self):
+        """
+        Shows the current slice of the rows. Cheap enough to call after every
+        batch of new rows.
+        """
+        if self.follow:
+            self.offset = self._max_offset()
+        self.offset = min(self.offset, self._max_offset())
+
+        shown = min(self.visible, len(self.rows) - self.offset)
+        while len(self._items) < shown:
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > shown:
+            self.tree.delete(self._items.pop())
+
+        for item, row in zip(self._items, self.rows[self.offset:self.offset + shown]):
+            tags = ("failed",) if failed_subject_mask(row[-1]) else ()
+            self.tree.item(item, values=row, tags=tags)
+
+        if self.rows:
+            self.scrollbar.set(self.offset / len(self.rows), (self.offset + shown) / len(self.rows))
+        else:
+            self.scrollbar.set(0, 1)
+
+
+class ScraperApp:
+    """
+    Main window: crawl settings, controls, live statistics and the result table.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.window.title("BISE Sargodha Matric Results")
+        self.window.geometry("1100x650")
+        self.events = queue.Queue()
+        self.controller = None
+        self.export_job = None
+        self.rows = []
+        self._reset_counts()
+
+        self._build_settings()
+        self._build_controls()
+        self.table = VirtualTable(self.window, RECORD_COLUMNS, self.rows,
+                                  widths={'Candidate Name': 170, 'Father Name': 170, 'overall result': 200})
+        self.table.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.window.after(POLL_INTERVAL_MS, self.poll_events)
+
+    def _reset_counts(self):
+        self.total = 0
+        self.found = 0
+        self.not_found = 0
+        self.failed = 0
+        self.initial_posts = metrics.histogram("post").count
+
+    def _build_settings(self):
+        frame = ttk.LabelFrame(self.window, text="Crawl")
+        frame.pack(fill="x", padx=8, pady=8)
+        self.start_var = tk.StringVar()
+        self.end_var = tk.StringVar()
+        self.concurrency_var = tk.StringVar(value="8")
+        self.url_var = tk.StringVar(value=BASE_URL)
+        self.output_var = tk.StringVar(value="bise_matric_results.xlsx")
+        self.checkpoint_var = tk.StringVar(value="bise_checkpoint.sqlite3")
+
+        fields = [
+            ("Start roll no", self.start_var, 12),
+            ("End roll no", self.end_var, 12),
+            ("Concurrency", self.concurrency_var, 5),
+        ]
+        for column, (label, variable, width) in enumerate(fields):
+            ttk.Label(frame, text=label).grid(row=0, column=column * 2, sticky="w", padx=(8, 4), pady=4)
+            ttk.Entry(frame, textvariable=variable, width=width).grid(row=0, column=column * 2 + 1, sticky="w")
+        ttk.Label(frame, text="Result page URL").grid(row=1, column=0, sticky="w", padx=(8, 4), pady=4)
+        ttk.Entry(frame, textvariable=self.url_var, width=60).grid(row=1, column=1, columnspan=5, sticky="we")
+        ttk.Label(frame, text="Excel file").grid(row=2, column=0, sticky="w", padx=(8, 4), pady=4)
+        ttk.Entry(frame, textvariable=self.output_var, width=60).grid(row=2, column=1, columnspan=5, sticky="we")
+        ttk.Button(frame, text="Browse...", command=self.choose_output).grid(row=2, column=6, padx=8)
+        ttk.Label(frame, text="Checkpoint").grid(row=3, column=0, sticky="w", padx=(8, 4), pady=4)
+        ttk.Entry(frame, textvariable=self.checkpoint_var, width=60).grid(row=3, column=1, columnspan=5, sticky="we")
+
+    def _build_controls(self):
+        frame = ttk.Frame(self.window)
+        frame.pack(fill="x", padx=8, pady=(0, 8))
+        self.start_button = ttk.Button(frame, text="Start", command=self.start_crawl)
+        self.pause_button = ttk.Button(frame, text="Pause", command=self.toggle_pause, state="disabled")
+        self.cancel_button = ttk.Button(frame, text="Cancel", command=self.cancel_crawl, state="disabled")
+        self.export_button = ttk.Button(frame, text="Export to Excel", command=self.export)
+        for button in (self.start_button, self.pause_button, self.cancel_button, self.export_button):
+            button.pack(side="left", padx=(0, 6))
+        self.progress = ttk.Progressbar(frame, length=200, mode="determinate")
+        self.progress.pack(side="left", padx=6)
+        self.status_var = tk.StringVar(value="Enter a roll number range and press Start.")
+        ttk.Label(frame, textvariable=self.status_var).pack(side="left", padx=6)
+
+    def choose_output(self):
+        filename = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")],
+                                                initialfile=self.output_var.get())
+        if filename:
+            self.output_var.set(filename)
+
+    def _read_settings(self):
+        """
+        Returns:
+            tuple or None: (start, end, concurrency), or None after showing what is wrong.
+        """
+        try:
+            start = int(self.start_var.get())
+            end = int(self.end_var.get())
+            concurrency = int(self.concurrency_var.get())
+        except ValueError:
+            messagebox.showerror("Invalid input", "Roll numbers and concurrency must be whole numbers.")
+            return None
+        if start <= 0 or end <= 0 or start > end:
+            messagebox.showerror("Invalid input", "Roll numbers must be positive and start cannot be greater than end.")
+            return None
+        if concurrency < 1:
+            messagebox.showerror("Invalid input", "Concurrency must be at least 1.")
+            return None
+        return start, end, concurrency
+
+    def start_crawl(self):
+        settings = self._read_settings()
+        if settings is None:
+            return
+        start, end, concurrency = settings
+        del self.rows[:]
+        self._reset_counts()
+        self.table.follow = True
+        self.table.refresh()
+        self.controller = CrawlController(self.events, start, end, base_url=self.url_var.get().strip(),
+                                          concurrency=concurrency, checkpoint_path=self.checkpoint_var.get(),
+                                          output=self.output_var.get().strip())
+        self.controller.start()
+        self.start_button.configure(state="disabled")
+        self.pause_button.configure(state="normal", text="Pause")
+        self.cancel_button.configure(state="normal")
+        self.status_var.set("Starting...")
+
+    def toggle_pause(self):
+        if self.controller is None:
+            return
+        if self.controller.paused:
+            self.controller.resume()
+            self.pause_button.configure(text="Pause")
+        else:
+            self.controller.pause()
+            self.pause_button.configure(text="Resume")
+        self.update_status()
+
+    def cancel_crawl(self):
+        if self.controller is not None:
+            self.controller.cancel()
+            self.cancel_button.configure(state="disabled")
+            self.pause_button.configure(state="disabled")
+            self.status_var.set("Cancelling, waiting for requests in flight...")
+
+    def export(self):
+        if self.export_job is not None and self.export_job.running:
+            return
+        self.export_job = ExportJob(self.events, self.checkpoint_var.get(), self.output_var.get())
+        self.export_job.start()
+        self.export_button.configure(state="disabled", text="Exporting...")
+
+    def poll_events(self):
+        """
+        Applies the events the background threads queued since the last poll,
+        then redraws the table and statistics once.
+        """
+        changed = False
+        for _ in range(MAX_EVENTS_PER_POLL):
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+            self.handle_event(event)
+        if changed:
+            self.table.refresh()
+        if self.controller is not None and self.controller.running:
+            self.update_status()
+        self.window.after(POLL_INTERVAL_MS, self.poll_events)
+
+    def handle_event(self, event):
+        kind = event[0]
+        if kind == "loaded":
+            self.rows.extend(event[1])
+        elif kind == "total":
+            self.total = event[1]
+            self.progress.configure(maximum=max(1, self.total))
+        elif kind == "result":
+            if event[2] is None:
+                self.not_found += 1
+            else:
+                self.found += 1
+                self.rows.append(event[2])
+        elif kind == "failed":
+            self.failed += 1
+        elif kind == "finished":
+            self.update_status()
+            self.status_var.set(("Cancelled. " if event[1] else "Finished. ") + self.status_var.get())
+            self.start_button.configure(state="normal")
+            self.pause_button.configure(state="disabled", text="Pause")
+            self.cancel_button.configure(state="disabled")
+        elif kind == "error":
+            messagebox.showerror("Crawl stopped", event[1])
+        elif kind == "exported":
+            self.export_button.configure(state="normal", text="Export to Excel")
+            messagebox.showinfo("Export finished", f"Wrote {event[2]} results to '{self.output_var.get()}'.")
+        elif kind == "export_error":
+            self.export_button.configure(state="normal", text="Export to Excel")
+            messagebox.showerror("Export failed", event[1])
+
+    def update_status(self):
+        done = self.found + self.not_found + self.failed
+        seconds = self.controller.active_seconds() if self.controller else 0.0
+        requests_per_second = (metrics.histogram("post").count - self.initial_posts) / seconds if seconds > 0 else 0.0
+        eta = (self.total - done) * seconds / done if done else None
+        self.progress.configure(value=done)
+        text = (f"{done}/{self.total} | found {self.found}, not found {self.not_found}, failed {self.failed} | "
+                f"{requests_per_second:.1f} req/s | ETA {format_eta(eta)}")
+        if self.controller is not None and self.controller.paused:
+            text += " | paused"
+        self.status_var.set(text)
+
+    def on_close(self):
+        if self.controller is not None and self.controller.running:
+            if not messagebox.askokcancel("Quit", "A crawl is running. Stop it and quit? "
+                                                  "Finished lookups are kept in the checkpoint."):
+                return
+            self.controller.cancel()
+        self.window.destroy()
+
 
 def main():
-    # Create the main window
     window = tk.Tk()
-    window.title("Greetings")
-    window.geometry("300x150") # Set a reasonable size for the window
-
-    # Create a label widget
-    label = tk.Label(
-        window,
-        text="hello waqas",
-        font=("Arial", 18),
-        pady=20 # Add some padding
-    )
-    label.pack()
-
-    # Create a button widget that closes the window
-    exit_button = tk.Button(
-        window,
-        text="Exit",
-        command=window.destroy, # The command to execute on click
-        width=10,
-        height=2
-    )
-    exit_button.pack(pady=10)
-
-    # Start the GUI event loop
+    ScraperApp(window)
     window.mainloop()
 
 if __name__ == "__main__":